@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_company_owner(apps, schema_editor):
+    Company = apps.get_model('app', 'Company')
+    UserCompany = apps.get_model('garpix_company', 'UserCompany')
+    UserCompanyRole = apps.get_model('app', 'UserCompanyRole')
+
+    owner_role = UserCompanyRole.objects.filter(role_type='owner').order_by('-id').first()
+    if owner_role is None:
+        return
+
+    Company.objects.update(owner=models.Subquery(
+        UserCompany.objects.filter(
+            company=models.OuterRef('pk'), role=owner_role, is_blocked=False
+        ).order_by('pk').values('user')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('app', '0011_alter_company_options_alter_usercompany_options_and_more'),
+        ('garpix_company', '0012_alter_invitetocompany_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='owner',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='owned_companies', to=settings.AUTH_USER_MODEL, verbose_name='Владелец'),
+        ),
+        migrations.RunPython(fill_company_owner, migrations.RunPython.noop),
+    ]
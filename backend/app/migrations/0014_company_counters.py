@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:02
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_company_counters(apps, schema_editor):
+    Company = apps.get_model('app', 'Company')
+    UserCompany = apps.get_model('garpix_company', 'UserCompany')
+    InviteToCompany = apps.get_model('garpix_company', 'InviteToCompany')
+
+    def count(queryset):
+        return Coalesce(models.Subquery(
+            queryset.filter(company=models.OuterRef('pk')).order_by().values('company').annotate(
+                count=models.Count('pk')).values('count'),
+            output_field=models.IntegerField()
+        ), 0)
+
+    Company.objects.update(
+        active_members_count=count(UserCompany.objects.filter(is_blocked=False)),
+        blocked_members_count=count(UserCompany.objects.filter(is_blocked=True)),
+        pending_invites_count=count(InviteToCompany.objects.filter(status='created')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_usercompany_app_usercompany_mbr'),
+        ('garpix_company', '0019_usercompanycounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='active_members_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Количество активных участников'),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='blocked_members_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Количество заблокированных участников'),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='pending_invites_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Количество ожидающих инвайтов'),
+        ),
+        migrations.RunPython(fill_company_counters, migrations.RunPython.noop),
+    ]
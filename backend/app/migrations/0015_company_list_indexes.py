@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:05
+
+from django.db import migrations, models
+
+SEARCH_FIELDS = ('title', 'full_title')
+
+
+def create_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('app', 'Company')._meta.db_table
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in SEARCH_FIELDS:
+        schema_editor.execute('CREATE INDEX IF NOT EXISTS %s ON %s USING gin (UPPER(%s::text) gin_trgm_ops)' % (
+            schema_editor.quote_name(f'{table}_{column}_trgm'),
+            schema_editor.quote_name(table),
+            schema_editor.quote_name(column),
+        ))
+
+
+def drop_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('app', 'Company')._meta.db_table
+    for column in SEARCH_FIELDS:
+        schema_editor.execute('DROP INDEX IF EXISTS %s' % schema_editor.quote_name(f'{table}_{column}_trgm'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_company_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trgm_indexes, drop_trgm_indexes),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['status', 'id'], name='app_company_status'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['status', 'created_at'], name='app_company_created'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['inn'], name='app_company_inn'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['ogrn'], name='app_company_ogrn'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['kpp'], name='app_company_kpp'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:07
+
+from django.core.management.base import CommandError
+from django.db import migrations, models
+
+DUPLICATES_SHOWN = 20
+
+
+def check_duplicate_inns(apps, schema_editor):
+    """
+    Уникальное ограничение не создается при наличии не удаленных компаний с одинаковым ИНН:
+    дубликаты нужно разрешить вручную (удалить или исправить ИНН)
+    """
+    Company = apps.get_model('app', 'Company')
+    duplicates = (
+        Company.objects.exclude(status='deleted').exclude(inn='').exclude(inn__isnull=True)
+        .values('inn').annotate(count=models.Count('pk')).filter(count__gt=1).order_by('inn')
+    )
+    total = duplicates.count()
+    if not total:
+        return
+    lines = [
+        f'{inn}: {", ".join(map(str, Company.objects.exclude(status="deleted").filter(inn=inn).values_list("pk", flat=True)))}'
+        for inn in duplicates.values_list('inn', flat=True)[:DUPLICATES_SHOWN]
+    ]
+    raise CommandError(
+        f'Найдены не удаленные компании с одинаковым ИНН ({total} ИНН), уникальное ограничение app_company_inn_uniq '
+        f'не может быть создано. Удалите дубликаты или исправьте ИНН и повторите миграцию.\n'
+        f'ИНН: id компаний\n' + '\n'.join(lines)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_company_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_inns, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='company',
+            constraint=models.UniqueConstraint(condition=models.Q(models.Q(('status', 'deleted'), _negated=True), models.Q(('inn', ''), _negated=True)), fields=('inn',), name='app_company_inn_uniq'),
+        ),
+    ]
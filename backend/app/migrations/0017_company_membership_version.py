@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_company_inn_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='membership_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Дата изменения состава участников и инвайтов'),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='membership_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Версия состава участников и инвайтов'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('app', '0017_company_membership_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='company',
+            name='owner',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_owned', to=settings.AUTH_USER_MODEL, verbose_name='Владелец'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:48
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_company_owner_related_name'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='usercompany',
+            name='app_usercompany_mbr',
+        ),
+    ]
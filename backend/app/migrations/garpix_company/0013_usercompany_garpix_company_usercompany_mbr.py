@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garpix_company', '0012_alter_invitetocompany_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usercompany',
+            index=models.Index(fields=['company', 'user', 'is_blocked', 'role'], name='garpix_company_usercompany_mbr'),
+        ),
+    ]
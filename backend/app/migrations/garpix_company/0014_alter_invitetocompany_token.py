@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:49
+
+from django.db import migrations, models
+from django.db.models import Count
+from garpix_utils.string import get_random_string
+
+
+def regenerate_duplicate_tokens(apps, schema_editor):
+    InviteToCompany = apps.get_model('garpix_company', 'InviteToCompany')
+
+    duplicates = InviteToCompany.objects.values('token').annotate(count=Count('pk')).filter(count__gt=1)
+    for duplicate in duplicates.iterator():
+        invites = InviteToCompany.objects.filter(token=duplicate['token']).order_by('pk')
+        for invite in invites[1:]:
+            token = get_random_string(16)
+            while InviteToCompany.objects.filter(token=token).exists():
+                token = get_random_string(16)
+            InviteToCompany.objects.filter(pk=invite.pk).update(token=token)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garpix_company', '0013_usercompany_garpix_company_usercompany_mbr'),
+    ]
+
+    operations = [
+        migrations.RunPython(regenerate_duplicate_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='invitetocompany',
+            name='token',
+            field=models.CharField(max_length=16, unique=True, verbose_name='Код подтверждения добавления'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:52
+
+from django.db import migrations, models
+import django_fsm
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garpix_company', '0014_alter_invitetocompany_token'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='invitetocompany',
+            name='status',
+            field=django_fsm.FSMField(choices=[('created', 'Создан'), ('accepted', 'Принят'), ('declined', 'Отвергнут'), ('expired', 'Истек')], default='created', max_length=50, verbose_name='Статус инвайта'),
+        ),
+        migrations.AddIndex(
+            model_name='invitetocompany',
+            index=models.Index(fields=['status', 'created_at'], name='garpix_company_inv_status_idx'),
+        ),
+    ]
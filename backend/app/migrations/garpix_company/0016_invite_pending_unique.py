@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:54
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+from django.db.models.functions import Lower
+import django.db.models.functions.text
+
+
+def decline_duplicate_pending_invites(apps, schema_editor):
+    InviteToCompany = apps.get_model('garpix_company', 'InviteToCompany')
+
+    pending = InviteToCompany.objects.filter(status='created')
+    for key in ('email_lower', 'user'):
+        queryset = pending.annotate(email_lower=Lower('email')).exclude(**{f'{key}__isnull': True})
+        duplicates = queryset.values('company', key).annotate(count=Count('pk'), last=Max('pk')).filter(count__gt=1)
+        for duplicate in duplicates.iterator():
+            queryset.filter(company=duplicate['company'], **{key: duplicate[key]}).exclude(
+                pk=duplicate['last']).update(status='declined')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garpix_company', '0015_alter_invitetocompany_status_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(decline_duplicate_pending_invites, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='invitetocompany',
+            constraint=models.UniqueConstraint(models.F('company'), django.db.models.functions.text.Lower('email'), condition=models.Q(('status', 'created')), name='garpix_company_inv_email_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='invitetocompany',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'created')), fields=('company', 'user'), name='garpix_company_inv_user_uniq'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garpix_company', '0016_invite_pending_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invitetocompany',
+            index=models.Index(fields=['company', 'status', 'role', 'id'], name='garpix_company_inv_list_idx'),
+        ),
+    ]
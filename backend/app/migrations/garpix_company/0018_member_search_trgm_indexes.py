@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import migrations
+
+SEARCH_FIELDS = ('email', 'first_name', 'last_name')
+
+
+def get_index_name(table, column):
+    return f'{table}_{column}_trgm'[:63]
+
+
+def create_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    table = User._meta.db_table
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for field_name in SEARCH_FIELDS:
+        try:
+            column = User._meta.get_field(field_name).column
+        except FieldDoesNotExist:
+            continue
+        schema_editor.execute('CREATE INDEX IF NOT EXISTS %s ON %s USING gin (UPPER(%s::text) gin_trgm_ops)' % (
+            schema_editor.quote_name(get_index_name(table, column)),
+            schema_editor.quote_name(table),
+            schema_editor.quote_name(column),
+        ))
+
+
+def drop_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    table = User._meta.db_table
+    for field_name in SEARCH_FIELDS:
+        try:
+            column = User._meta.get_field(field_name).column
+        except FieldDoesNotExist:
+            continue
+        schema_editor.execute('DROP INDEX IF EXISTS %s' % schema_editor.quote_name(get_index_name(table, column)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('garpix_company', '0017_invite_list_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trgm_indexes, drop_trgm_indexes),
+    ]
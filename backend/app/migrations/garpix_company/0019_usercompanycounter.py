@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_user_email_code_send_date_and_more'),
+        ('garpix_company', '0018_member_search_trgm_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCompanyCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='company_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('companies_count', models.IntegerField(default=0, verbose_name='Количество компаний')),
+            ],
+            options={
+                'verbose_name': 'Счетчик компаний пользователя | User companies counter',
+                'verbose_name_plural': 'Счетчики компаний пользователей | User companies counters',
+            },
+        ),
+    ]
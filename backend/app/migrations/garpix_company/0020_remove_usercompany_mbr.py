@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:48
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garpix_company', '0019_usercompanycounter'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='usercompany',
+            name='garpix_company_usercompany_mbr',
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garpix_company', '0020_remove_usercompany_mbr'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='invitetocompany',
+            name='garpix_company_inv_list_idx',
+        ),
+        migrations.AddIndex(
+            model_name='invitetocompany',
+            index=models.Index(fields=['company', 'status', 'created_at', 'id'], name='garpix_company_inv_list_idx'),
+        ),
+    ]
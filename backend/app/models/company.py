@@ -1,9 +1,24 @@
-from garpix_company.models import AbstractCompany, get_user_company_model
-UserCompany = get_user_company_model()
+from django.db import models
+from django.db.models import Q
+
+from garpix_company.helpers import COMPANY_STATUS_ENUM
+from garpix_company.models import AbstractCompany
+from garpix_company.services.counter_service import get_users_companies_counts
 
 
 class Company(AbstractCompany):
 
+    class Meta(AbstractCompany.Meta):
+        constraints = [
+            models.UniqueConstraint(fields=['inn'], condition=~Q(status=COMPANY_STATUS_ENUM.DELETED) & ~Q(inn=''),
+                                    name='app_company_inn_uniq'),
+        ]
+
     @classmethod
     def check_user_companies_limit(cls, user):
-        return UserCompany.objects.filter(user=user).count() < 10
+        return cls.check_users_companies_limit([user])[user.pk]
+
+    @classmethod
+    def check_users_companies_limit(cls, users):
+        counts = get_users_companies_counts(user.pk for user in users)
+        return {user.pk: counts[user.pk] < 10 for user in users}
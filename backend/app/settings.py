@@ -63,6 +63,8 @@ GARPIX_COMPANY_ROLE_SERIALIZER = 'garpix_company.serializers.role.GarpixCompanyR
 
 GARPIX_COMPANY_INVITE_NOT_USERS = True
 
+GARPIX_COMPANY_UNIQUE_INN = True
+
 SITE_URL = '127.0.0.1:8000'
 
 ISO_LOGS_PRODUCT = 'garpix_company'
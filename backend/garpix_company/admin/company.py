@@ -1,7 +1,8 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.forms import BaseInlineFormSet, ValidationError
-from django.utils.translation import gettext as _
+from django.utils.translation import gettext as _, gettext_lazy as _l
 from garpix_company.models import get_user_company_model, get_company_role_model
+from garpix_company.services.company_status_service import BulkCompanyStatusService
 
 
 UserCompany = get_user_company_model()
@@ -14,6 +15,14 @@ class UserCompanyInlineFormset(BaseInlineFormSet):
 
         self._validate_has_one_owner()
 
+    def save(self, commit=True):
+        saved = super().save(commit)
+
+        if commit:
+            self._save_company_owner()
+
+        return saved
+
     def _validate_has_one_owner(self) -> None:
         owners = set()
 
@@ -24,6 +33,17 @@ class UserCompanyInlineFormset(BaseInlineFormSet):
         if len(owners) != 1:
             raise ValidationError(_('В компании должен быть 1 владелец.'))
 
+        self._owner = owners.pop()
+
+    def _save_company_owner(self) -> None:
+        owner = getattr(self, '_owner', None)
+
+        if owner is None or self.instance.owner_id == owner.pk:
+            return
+
+        self.instance.owner = owner
+        self.instance.save(update_fields=['owner', 'updated_at'])
+
 
 class UserCompanyInline(admin.TabularInline):
     model = UserCompany
@@ -33,6 +53,31 @@ class UserCompanyInline(admin.TabularInline):
 
 
 class CompanyAdmin(admin.ModelAdmin):
-    list_display = ('title', 'created_at')
-    readonly_fields = ('created_at', )
+    list_display = ('title', 'owner', 'active_members_count', 'pending_invites_count', 'created_at')
+    list_select_related = ('owner', )
+    readonly_fields = ('owner', 'active_members_count', 'blocked_members_count', 'pending_invites_count',
+                       'created_at', )
+    list_filter = ('status', )
     inlines = (UserCompanyInline,)
+    actions = ('ban_companies', 'activate_companies', 'delete_companies')
+
+    def _bulk_status(self, request, queryset, transition_name):
+        # выбранные компании считаются до смены статуса: queryset может быть отфильтрован по статусу
+        selected = queryset.count()
+        changed = BulkCompanyStatusService(transition_name).apply_queryset(queryset)
+        skipped = selected - changed
+        self.message_user(request, _('Изменен статус компаний: %(changed)s, пропущено: %(skipped)s') % {
+            'changed': changed, 'skipped': skipped
+        }, messages.SUCCESS if not skipped else messages.WARNING)
+
+    @admin.action(description=_l('Забанить выбранные компании'))
+    def ban_companies(self, request, queryset):
+        self._bulk_status(request, queryset, 'comp_banned')
+
+    @admin.action(description=_l('Разбанить выбранные компании'))
+    def activate_companies(self, request, queryset):
+        self._bulk_status(request, queryset, 'comp_active')
+
+    @admin.action(description=_l('Удалить выбранные компании (со сменой статуса)'))
+    def delete_companies(self, request, queryset):
+        self._bulk_status(request, queryset, 'comp_deleted')
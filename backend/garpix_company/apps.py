@@ -1,7 +1,31 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_init, post_save, post_delete
 
 
 class GarpixCompanyConfig(AppConfig):
     name = 'garpix_company'
     verbose_name = 'Компания Garpix | Garpix Company'
     verbose_name_plural = 'Компании Garpix | Garpix Companies'
+
+    def ready(self):
+        from garpix_company.models import get_company_role_model, get_user_company_model, InviteToCompany
+        from garpix_company.services import counter_service
+        from garpix_company.services.role_service import invalidate_roles_cache
+
+        CompanyRole = get_company_role_model()
+        post_save.connect(invalidate_roles_cache, sender=CompanyRole, dispatch_uid='garpix_company_roles_save')
+        post_delete.connect(invalidate_roles_cache, sender=CompanyRole, dispatch_uid='garpix_company_roles_delete')
+
+        UserCompany = get_user_company_model()
+        post_init.connect(counter_service.remember_member_state, sender=UserCompany,
+                          dispatch_uid='garpix_company_member_counters_init')
+        post_save.connect(counter_service.update_member_counters_on_save, sender=UserCompany,
+                          dispatch_uid='garpix_company_member_counters_save')
+        post_delete.connect(counter_service.update_member_counters_on_delete, sender=UserCompany,
+                            dispatch_uid='garpix_company_member_counters_delete')
+        post_init.connect(counter_service.remember_invite_state, sender=InviteToCompany,
+                          dispatch_uid='garpix_company_invite_counters_init')
+        post_save.connect(counter_service.update_invite_counters_on_save, sender=InviteToCompany,
+                          dispatch_uid='garpix_company_invite_counters_save')
+        post_delete.connect(counter_service.update_invite_counters_on_delete, sender=InviteToCompany,
+                            dispatch_uid='garpix_company_invite_counters_delete')
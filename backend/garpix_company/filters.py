@@ -0,0 +1,65 @@
+import operator
+from functools import reduce
+
+import django_filters
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from rest_framework import filters
+
+from garpix_company.helpers import COMPANY_STATUS_ENUM
+from garpix_company.models.company import get_company_model
+
+USER_LOOKUP_PREFIX = 'user__'
+
+
+class MemberSearchFilter(filters.SearchFilter):
+    """
+    Поиск участников компании по полям пользователя (параметр search, как у SearchFilter).
+    Пользователи ищутся подзапросом по таблице пользователей без JOIN, что позволяет PostgreSQL
+    использовать триграммные GIN индексы по UPPER(поле) (миграция garpix_company 0018).
+    На остальных СУБД выполняется тот же запрос без индексов.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+
+        if not all(field.startswith(USER_LOOKUP_PREFIX) for field in search_fields):
+            return super().filter_queryset(request, queryset, view)
+
+        user_fields = [field[len(USER_LOOKUP_PREFIX):] for field in search_fields]
+        users = get_user_model().objects.all()
+        for term in search_terms:
+            users = users.filter(reduce(operator.or_, (Q(**{f'{field}__icontains': term}) for field in user_fields)))
+        return queryset.filter(user__in=users.values('pk'))
+
+
+class MemberOrderingFilter(filters.OrderingFilter):
+    """
+    Сортировка участников с добавлением id для стабильного порядка страниц
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view) or [])
+        if ordering and ordering[-1].lstrip('-') != 'id':
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return ordering
+
+
+class CompanyFilter(django_filters.FilterSet):
+    """
+    Фильтры списка компаний. Без параметра status выводятся активные компании
+    """
+    status = django_filters.ChoiceFilter(choices=COMPANY_STATUS_ENUM.CHOICES)
+    created_at = django_filters.IsoDateTimeFromToRangeFilter()
+
+    class Meta:
+        model = get_company_model()
+        fields = ('status', 'inn', 'ogrn', 'kpp', 'created_at')
+
+    def filter_queryset(self, queryset):
+        if not self.form.cleaned_data.get('status'):
+            queryset = queryset.filter(status=COMPANY_STATUS_ENUM.ACTIVE)
+        return super().filter_queryset(queryset)
@@ -17,8 +17,10 @@ class CHOICES_INVITE_STATUS_ENUM:
     CREATED = 'created'
     ACCEPTED = 'accepted'
     DECLINED = 'declined'
+    EXPIRED = 'expired'
     CHOICES = (
         (CREATED, _('Создан')),
         (ACCEPTED, _('Принят')),
-        (DECLINED, _('Отвергнут'))
+        (DECLINED, _('Отвергнут')),
+        (EXPIRED, _('Истек'))
     )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from garpix_company.models import get_company_model
+from garpix_company.services.invite_import_service import InviteImportError, InviteImportService, read_invite_rows
+
+
+class Command(BaseCommand):
+    help = 'Импорт инвайтов в компанию из CSV/XLSX файла с отчетом по строкам в CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('company_id', type=int)
+        parser.add_argument('path', help='Путь к CSV или XLSX файлу (колонки email, user, role)')
+        parser.add_argument('--output', help='Путь к файлу отчета (по умолчанию - stdout)')
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        Company = get_company_model()
+        try:
+            company = Company.active_objects.get(pk=options['company_id'])
+        except Company.DoesNotExist:
+            raise CommandError(f'Компания с id {options["company_id"]} не найдена')
+
+        service = InviteImportService(company, chunk_size=options['chunk_size'])
+        with open(options['path'], 'rb') as file:
+            try:
+                rows = read_invite_rows(file, options['path'])
+            except InviteImportError as e:
+                raise CommandError(str(e))
+            if options['output']:
+                with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                    output.writelines(service.iter_csv(rows))
+            else:
+                for line in service.iter_csv(rows):
+                    self.stdout.write(line, ending='')
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from garpix_company.services.company_purge_service import CompanyPurgeService, get_purgeable_companies
+
+
+class Command(BaseCommand):
+    help = 'Окончательное удаление компаний в статусе deleted с истекшим сроком хранения'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=None,
+                            help='Срок хранения удаленных компаний в днях (GARPIX_COMPANY_DELETED_RETENTION_DAYS)')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Количество участников или инвайтов, удаляемых в одной транзакции')
+        parser.add_argument('--sleep', type=float, default=None,
+                            help='Пауза между порциями в секундах')
+        parser.add_argument('--max-companies', type=int, default=None,
+                            help='Максимальное количество компаний за запуск')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать количество компаний для удаления')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = get_purgeable_companies(options['retention_days']).count()
+            self.stdout.write(f'Компаний для удаления: {count}')
+            return
+
+        def progress(company_id, stats):
+            self.stdout.write(f'Компания {company_id}: удалено компаний {stats["companies"]}, '
+                              f'участников {stats["members"]}, инвайтов {stats["invites"]}, '
+                              f'{stats["seconds"]} с')
+
+        stats = CompanyPurgeService(options['chunk_size'], options['sleep']).purge(
+            options['retention_days'], options['max_companies'], progress if options['verbosity'] > 1 else None)
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено компаний: {stats["companies"]}, участников: {stats["members"]}, '
+            f'инвайтов: {stats["invites"]}, порций: {stats["chunks"]}, время: {stats["seconds"]} с'))
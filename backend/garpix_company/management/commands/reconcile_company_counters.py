@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from garpix_company.managers.company import actual_counts
+from garpix_company.models import get_company_model, get_user_company_model, UserCompanyCounter
+
+
+class Command(BaseCommand):
+    help = 'Проверка и исправление счетчиков участников и инвайтов компаний и счетчиков компаний пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Только проверить расхождения, не исправляя их')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        Company = get_company_model()
+        UserCompany = get_user_company_model()
+
+        company_counts = actual_counts()
+        company_drift = Q(pk__in=[])
+        for field in company_counts:
+            company_drift |= ~Q(**{field: F(f'actual_{field}')})
+        company_ids = list(Company.objects.with_actual_counts().filter(company_drift).values_list('pk', flat=True))
+
+        def user_count():
+            return Coalesce(Subquery(
+                UserCompany.objects.filter(user=OuterRef('user')).order_by().values('user').annotate(
+                    count=Count('pk')).values('count'),
+                output_field=IntegerField()
+            ), 0)
+
+        user_ids = list(UserCompanyCounter.objects.annotate(actual_companies_count=user_count()).exclude(
+            companies_count=F('actual_companies_count')).values_list('pk', flat=True))
+
+        if options['check']:
+            if company_ids or user_ids:
+                raise CommandError(f'Расхождения счетчиков у компаний: {len(company_ids)} '
+                                   f'(id: {", ".join(map(str, company_ids[:100]))}), '
+                                   f'у пользователей: {len(user_ids)} (id: {", ".join(map(str, user_ids[:100]))})')
+            self.stdout.write(self.style.SUCCESS('Расхождений не найдено'))
+            return
+
+        chunk_size = options['chunk_size']
+        for start in range(0, len(company_ids), chunk_size):
+            Company.objects.filter(pk__in=company_ids[start:start + chunk_size]).update(**actual_counts())
+        for start in range(0, len(user_ids), chunk_size):
+            UserCompanyCounter.objects.filter(pk__in=user_ids[start:start + chunk_size]).update(
+                companies_count=user_count())
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено компаний: {len(company_ids)}, пользователей: {len(user_ids)}'))
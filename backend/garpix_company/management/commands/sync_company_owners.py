@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, OuterRef, Q, Subquery
+
+from garpix_company.models import get_company_model, get_user_company_model
+from garpix_company.services.role_service import UserCompanyRoleService
+
+
+class Command(BaseCommand):
+    help = 'Заполнение и проверка поля владельца компании по ролям участников'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Только проверить расхождения, не исправляя их')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        Company = get_company_model()
+        UserCompany = get_user_company_model()
+
+        owner_role = UserCompanyRoleService().get_owner_role()
+        if owner_role is None:
+            raise CommandError('Роль владельца не найдена')
+
+        def actual_owner():
+            return Subquery(
+                UserCompany.active_objects.filter(
+                    company=OuterRef('pk'), role=owner_role
+                ).order_by('pk').values('user')[:1]
+            )
+
+        owner_missing = Q(owner__isnull=True, actual_owner__isnull=False)
+        owner_stale = Q(owner__isnull=False, actual_owner__isnull=True)
+        owner_changed = Q(owner__isnull=False, actual_owner__isnull=False) & ~Q(owner=F('actual_owner'))
+        drift_ids = list(Company.objects.annotate(actual_owner=actual_owner()).filter(
+            owner_missing | owner_stale | owner_changed
+        ).values_list('pk', flat=True))
+
+        if options['check']:
+            if drift_ids:
+                raise CommandError(f'Расхождения владельца у компаний: {len(drift_ids)} '
+                                   f'(id: {", ".join(map(str, drift_ids[:100]))})')
+            self.stdout.write(self.style.SUCCESS('Расхождений не найдено'))
+            return
+
+        chunk_size = options['chunk_size']
+        for start in range(0, len(drift_ids), chunk_size):
+            Company.objects.filter(pk__in=drift_ids[start:start + chunk_size]).update(owner=actual_owner())
+
+        self.stdout.write(self.style.SUCCESS(f'Обновлено компаний: {len(drift_ids)}'))
@@ -1,8 +1,74 @@
 from django.db import models
+from django.db.models import Count, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 
 from garpix_company.helpers import COMPANY_STATUS_ENUM
 
 
-class CompanyActiveManager(models.Manager):
+def actual_counts():
+    """
+    Выражения фактических значений счетчиков компании
+    :return: словарь {поле счетчика: выражение}
+    """
+    from garpix_company.models.invite import InviteToCompany
+    from garpix_company.models.user_company import get_user_company_model
+
+    UserCompany = get_user_company_model()
+
+    def count(queryset):
+        return Coalesce(Subquery(
+            queryset.filter(company=OuterRef('pk')).order_by().values('company').annotate(
+                count=Count('pk')).values('count'),
+            output_field=IntegerField()
+        ), 0)
+
+    return {
+        'active_members_count': count(UserCompany.objects.filter(is_blocked=False)),
+        'blocked_members_count': count(UserCompany.objects.filter(is_blocked=True)),
+        'pending_invites_count': count(InviteToCompany.created_objects.all()),
+    }
+
+
+class CompanyQuerySet(models.QuerySet):
+
+    def with_owner(self):
+        """
+        Аннотирует email владельца (id владельца хранится в поле owner)
+        """
+        return self.annotate(owner_email=F('owner__email'))
+
+    def with_actual_counts(self):
+        """
+        Аннотирует фактическое количество активных и заблокированных участников и ожидающих инвайтов
+        (для сверки со счетчиками active_members_count, blocked_members_count, pending_invites_count)
+        """
+        return self.annotate(**{f'actual_{field}': expression for field, expression in actual_counts().items()})
+
+    def with_user_role(self, user):
+        """
+        Аннотирует роль, блокировку и владение пользователя в компании
+        """
+        from garpix_company.models.user_company import get_user_company_model
+
+        UserCompany = get_user_company_model()
+
+        if user is None or not user.is_authenticated:
+            return self.annotate(user_role_id=Value(None, output_field=IntegerField()),
+                                 user_role_type=Value(None, output_field=models.CharField()),
+                                 user_is_blocked=Value(None, output_field=models.BooleanField()),
+                                 user_is_owner=Value(False, output_field=models.BooleanField()))
+
+        membership = UserCompany.objects.filter(company=OuterRef('pk'), user=user)
+        return self.annotate(user_role_id=Subquery(membership.values('role')[:1]),
+                             user_role_type=Subquery(membership.values('role__role_type')[:1]),
+                             user_is_blocked=Subquery(membership.values('is_blocked')[:1]),
+                             user_is_owner=ExpressionWrapper(Q(owner=user), output_field=models.BooleanField()))
+
+
+class CompanyManager(models.Manager.from_queryset(CompanyQuerySet)):
+    pass
+
+
+class CompanyActiveManager(CompanyManager):
     def get_queryset(self):
         return super().get_queryset().filter(status=COMPANY_STATUS_ENUM.ACTIVE)
@@ -2,3 +2,4 @@ from .company import AbstractCompany, get_company_model
 from .user_company import AbstractUserCompany, get_user_company_model, UserCompany
 from .invite import InviteToCompany
 from .user_role import AbstractUserCompanyRole, get_company_role_model
+from .user_counter import UserCompanyCounter
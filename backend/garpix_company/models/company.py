@@ -1,19 +1,23 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from django_fsm import FSMField, transition, can_proceed
 from django.contrib.auth import get_user_model
 from garpix_company.helpers import COMPANY_STATUS_ENUM
-from garpix_company.managers.company import CompanyActiveManager
+from garpix_company.managers.company import CompanyActiveManager, CompanyManager
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.apps import apps as django_apps
 from garpix_notify.models import Notify
 from garpix_company.models.user_company import get_user_company_model
+from garpix_company.services.membership_service import CompanyMembership
 from garpix_company.services.role_service import UserCompanyRoleService
 
 User = get_user_model()
 
+COUNTER_FIELDS = ('active_members_count', 'blocked_members_count', 'pending_invites_count', 'membership_version',
+                  'membership_updated_at')
+
 
 class AbstractCompany(models.Model):
     """
@@ -36,20 +40,51 @@ class AbstractCompany(models.Model):
     status = FSMField(default=COMPANY_STATUS.ACTIVE, choices=COMPANY_STATUS.CHOICES, verbose_name=_('Статус'))
     participants = models.ManyToManyField(User, through=settings.GARPIX_USER_COMPANY_MODEL,
                                           verbose_name=_('Участники компании'))
+    owner = models.ForeignKey(User, null=True, blank=True, editable=False, on_delete=models.SET_NULL,
+                              related_name='%(app_label)s_%(class)s_owned', verbose_name=_('Владелец'))
+    active_members_count = models.IntegerField(default=0, editable=False,
+                                               verbose_name=_('Количество активных участников'))
+    blocked_members_count = models.IntegerField(default=0, editable=False,
+                                                verbose_name=_('Количество заблокированных участников'))
+    pending_invites_count = models.IntegerField(default=0, editable=False,
+                                                verbose_name=_('Количество ожидающих инвайтов'))
+    membership_version = models.PositiveIntegerField(default=0, editable=False,
+                                                     verbose_name=_('Версия состава участников и инвайтов'))
+    membership_updated_at = models.DateTimeField(null=True, blank=True, editable=False,
+                                                 verbose_name=_('Дата изменения состава участников и инвайтов'))
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Дата создания'))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Дата изменения'))
-    objects = models.Manager()
+    objects = CompanyManager()
     active_objects = CompanyActiveManager()
 
     class Meta:
         verbose_name = 'Компания | Company'
         verbose_name_plural = 'Компании | Companies'
         ordering = ['-id']
+        indexes = [
+            models.Index(fields=['status', 'id'], name='%(app_label)s_%(class)s_status'),
+            models.Index(fields=['status', 'created_at'], name='%(app_label)s_%(class)s_created'),
+            models.Index(fields=['inn'], name='%(app_label)s_%(class)s_inn'),
+            models.Index(fields=['ogrn'], name='%(app_label)s_%(class)s_ogrn'),
+            models.Index(fields=['kpp'], name='%(app_label)s_%(class)s_kpp'),
+        ]
         abstract = True
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # счетчики изменяются только запросами UPDATE с F-выражениями,
+        # сохранение загруженного экземпляра не должно перезаписывать их устаревшими значениями
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # отложенные поля (.only()/.defer()) не сохраняются, как и в Model.save()
+            deferred = self.get_deferred_fields()
+            skipped = deferred | set(COUNTER_FIELDS)
+            if not set(COUNTER_FIELDS) <= deferred:
+                kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                           if not field.primary_key and field.attname not in skipped]
+        super().save(*args, **kwargs)
+
     def delete(self, using=None, keep_parents=False):
         if self.status != COMPANY_STATUS_ENUM.DELETED:
             self.comp_deleted()
@@ -58,16 +93,6 @@ class AbstractCompany(models.Model):
     def hard_delete(self):
         super().delete()
 
-    @property
-    def owner(self):
-        UserCompany = get_user_company_model()
-        company_role_service = UserCompanyRoleService()
-        user_model_instance = UserCompany.active_objects.select_related('user').filter(
-            role=company_role_service.get_owner_role(), company=self).first()
-        if user_model_instance:
-            return user_model_instance.user
-        return None
-
     @property
     def can_banned(self):
         return can_proceed(self.comp_banned)
@@ -92,31 +117,51 @@ class AbstractCompany(models.Model):
     def comp_deleted(self):
         pass
 
+    def get_membership(self, user):
+        """
+        Членство пользователя в компании
+        :return: CompanyMembership
+        """
+        return CompanyMembership.load(user, self)
+
+    def is_owner(self, user):
+        """
+        Является ли пользователь владельцем компании (сравнение по полю владельца, без запроса)
+        :return: bool
+        """
+        return user is not None and user.pk is not None and self.owner_id == user.pk
+
     def change_owner(self, data, current_user):
         UserCompany = get_user_company_model()
         company_role_service = UserCompanyRoleService()
 
         new_owner_id = data.get('new_owner')
-        if self.owner != current_user:
+        if not self.is_owner(current_user):
             return False, _('Действие доступно только для владельца компании')
         try:
-            user_company = UserCompany.objects.get(company=self, pk=int(new_owner_id))
-            if self.owner == user_company.user:
-                return False, _('Пользователь с указанным id уже является владельцем компании')
-            if user_company.is_blocked:
-                return False, _('Нельзя сделать владельцем заблокированного пользователя')
-            admin_role = company_role_service.get_admin_role()
-            owner_role = company_role_service.get_owner_role()
-
-            new_role = data.get('role', admin_role)
-            stay_in_company = data.get('stay_in_company', True)
-
-            if stay_in_company:
-                UserCompany.objects.filter(company=self, user=current_user).update(role=new_role)
-            else:
-                UserCompany.objects.filter(company=self, user=current_user).delete()
-            user_company.role = owner_role
-            user_company.save()
+            with transaction.atomic():
+                company = self.__class__.objects.select_for_update().get(pk=self.pk)
+                if not company.is_owner(current_user):
+                    return False, _('Действие доступно только для владельца компании')
+                user_company = UserCompany.objects.get(company=self, pk=int(new_owner_id))
+                if user_company.user_id == company.owner_id:
+                    return False, _('Пользователь с указанным id уже является владельцем компании')
+                if user_company.is_blocked:
+                    return False, _('Нельзя сделать владельцем заблокированного пользователя')
+                admin_role = company_role_service.get_admin_role()
+                owner_role = company_role_service.get_owner_role()
+
+                new_role = data.get('role') or admin_role
+                stay_in_company = data.get('stay_in_company', True)
+
+                if stay_in_company:
+                    UserCompany.objects.filter(company=self, user=current_user).update(role=new_role)
+                else:
+                    UserCompany.objects.filter(company=self, user=current_user).delete()
+                user_company.role = owner_role
+                user_company.save()
+                self.owner_id = user_company.user_id
+                self.save(update_fields=['owner', 'updated_at'])
             return True, None
         except UserCompany.DoesNotExist:
             return False, _('Пользователь с указанным id не является сотрудником компании')
@@ -132,6 +177,16 @@ class AbstractCompany(models.Model):
     def check_user_companies_limit(cls, user):
         return True
 
+    @classmethod
+    def check_users_companies_limit(cls, users):
+        """
+        Проверка лимита количества компаний для нескольких пользователей.
+        По умолчанию вызывает check_user_companies_limit для каждого пользователя,
+        переопределите для проверки одним запросом
+        :return: словарь {id пользователя: bool}
+        """
+        return {user.pk: cls.check_user_companies_limit(user) for user in users}
+
     @classmethod
     def invite_confirmation_link(cls, token, invite=None):
         return f'{settings.SITE_URL}invite/{token}'
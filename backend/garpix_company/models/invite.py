@@ -1,5 +1,10 @@
+from datetime import timedelta
+
 from django.conf import settings
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
 from django.db.utils import IntegrityError
@@ -10,10 +15,15 @@ from garpix_utils.string import get_random_string
 from garpix_company.helpers import CHOICES_INVITE_STATUS_ENUM
 from garpix_company.managers.invite import CreatedInviteManager
 from garpix_company.models.user_company import get_user_company_model
+from garpix_company.services.counter_service import update_company_counters
+from garpix_company.services.invite_notification_service import queue_invite_notifications
 
 User = get_user_model()
 UserCompany = get_user_company_model()
 
+TOKEN_LENGTH = 16
+TOKEN_ATTEMPTS = 10
+
 
 class InviteToCompany(models.Model):
     CHOICES_INVITE_STATUS = CHOICES_INVITE_STATUS_ENUM
@@ -21,7 +31,7 @@ class InviteToCompany(models.Model):
     company = models.ForeignKey(settings.GARPIX_COMPANY_MODEL, on_delete=models.CASCADE, verbose_name=_('Компания'))
     email = models.EmailField(null=True, blank=True, verbose_name=_('E-mail инвайта'))
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Дата/время создания"))
-    token = models.CharField(max_length=16, verbose_name=_("Код подтверждения добавления"))
+    token = models.CharField(max_length=TOKEN_LENGTH, unique=True, verbose_name=_("Код подтверждения добавления"))
     status = FSMField(choices=CHOICES_INVITE_STATUS.CHOICES, default=CHOICES_INVITE_STATUS.CREATED,
                       verbose_name=_("Статус инвайта"))
     role = models.ForeignKey(settings.GARPIX_COMPANY_ROLE_MODEL, on_delete=models.CASCADE,
@@ -34,26 +44,97 @@ class InviteToCompany(models.Model):
         verbose_name = 'Инвайт в компанию | Invite to company'
         verbose_name_plural = 'Инвайты в компании | Invites to companies'
         ordering = ['-id']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='garpix_company_inv_status_idx'),
+            models.Index(fields=['company', 'status', 'created_at', 'id'], name='garpix_company_inv_list_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint('company', Lower('email'), condition=Q(status=CHOICES_INVITE_STATUS_ENUM.CREATED),
+                                    name='garpix_company_inv_email_uniq'),
+            models.UniqueConstraint(fields=['company', 'user'], condition=Q(status=CHOICES_INVITE_STATUS_ENUM.CREATED),
+                                    name='garpix_company_inv_user_uniq'),
+        ]
 
     def __str__(self):
         return f'Инвайт в компанию {str(self.company)} для {self.email}'
 
     def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        search_data = {'company': self.company}
-        if self.user:
-            search_data.update({'user': self.user})
-        else:
-            search_data.update({'email': self.email})
+        if self.pk is not None:
+            super().save(*args, **kwargs)
+            return
+
+        # Новый инвайт заменяет ожидающие инвайты того же пользователя/email.
+        # При конкурентном создании срабатывает уникальное ограничение - повторяем в точке сохранения
+        for attempt in range(TOKEN_ATTEMPTS):
+            self.supersede_pending()
+            self.token = self.generate_token()
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                break
+            except IntegrityError:
+                if attempt == TOKEN_ATTEMPTS - 1:
+                    raise
+
+        queue_invite_notifications([self.pk])
+
+    def get_pending_duplicates(self):
+        """
+        Ожидающие инвайты в компанию для того же пользователя или email (без учета регистра)
+        :return: QuerySet
+        """
+        condition = Q(pk__in=[])
+        if self.user_id:
+            condition |= Q(user_id=self.user_id)
+        if self.email:
+            condition |= Q(email_lower=self.email.lower())
+        return self.__class__.created_objects.alias(email_lower=Lower('email')).filter(
+            condition, company_id=self.company_id).exclude(pk=self.pk)
+
+    def supersede_pending(self):
+        """
+        Отклонить ожидающие инвайты, которые заменяет текущий
+        :return: количество отклоненных инвайтов
+        """
+        declined = self.get_pending_duplicates().update(status=self.CHOICES_INVITE_STATUS.DECLINED)
+        update_company_counters(self.company_id, pending=-declined)
+        return declined
 
-        self.__class__.objects.filter(**search_data).update(status=self.CHOICES_INVITE_STATUS.DECLINED)
+    @classmethod
+    def generate_token(cls):
+        """
+        Уникальный код инвайта. Уникальность дополнительно гарантируется индексом
+        :return: str
+        """
+        token = get_random_string(TOKEN_LENGTH)
+        for _attempt in range(TOKEN_ATTEMPTS):
+            if not cls.objects.filter(token=token).exists():
+                break
+            token = get_random_string(TOKEN_LENGTH)
+        return token
+
+    @classmethod
+    def get_ttl(cls):
+        """
+        Срок действия инвайта (GARPIX_COMPANY_INVITE_TTL, секунды), None - бессрочно
+        :return: timedelta | None
+        """
+        ttl = getattr(settings, 'GARPIX_COMPANY_INVITE_TTL', None)
+        return timedelta(seconds=ttl) if ttl else None
 
-        if is_new:
-            self.token = get_random_string(16)
-            email = self.email if self.email else self.user.email
-            self.company.send_invite_notification(invite=self, email=email)
+    @property
+    def expires_at(self):
+        ttl = self.get_ttl()
+        if ttl is None or self.created_at is None:
+            return None
+        return self.created_at + ttl
 
-        super().save(*args, **kwargs)
+    @property
+    def is_expired(self):
+        if self.status == self.CHOICES_INVITE_STATUS.EXPIRED:
+            return True
+        expires_at = self.expires_at
+        return self.status == self.CHOICES_INVITE_STATUS.CREATED and expires_at is not None and expires_at <= timezone.now()
 
     @property
     def can_decline(self):
@@ -61,13 +142,19 @@ class InviteToCompany(models.Model):
 
     @property
     def can_accept(self):
-        return can_proceed(self._in_accept)
+        return not self.is_expired and can_proceed(self._in_accept)
+
+    @property
+    def can_expire(self):
+        return can_proceed(self._in_expire)
 
     def accept(self):
         """
         Принятие инвайта в компанию
         :return:
         """
+        if self.is_expired:
+            return False, _('Срок действия приглашения истек')
         try:
             with transaction.atomic():
                 user = self.user if self.user else User.objects.get(email=self.email)
@@ -87,6 +174,14 @@ class InviteToCompany(models.Model):
         self._in_decline()
         self.save()
 
+    def expire(self):
+        """
+        Истечение срока действия инвайта
+        :return:
+        """
+        self._in_expire()
+        self.save()
+
     @transition(field=status, source=CHOICES_INVITE_STATUS.CREATED, target=CHOICES_INVITE_STATUS.ACCEPTED)
     def _in_accept(self, user):
         UserCompany.objects.create(
@@ -98,3 +193,7 @@ class InviteToCompany(models.Model):
     @transition(field=status, source=CHOICES_INVITE_STATUS.CREATED, target=CHOICES_INVITE_STATUS.DECLINED)
     def _in_decline(self):
         pass
+
+    @transition(field=status, source=CHOICES_INVITE_STATUS.CREATED, target=CHOICES_INVITE_STATUS.EXPIRED)
+    def _in_expire(self):
+        pass
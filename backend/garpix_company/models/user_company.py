@@ -36,12 +36,20 @@ class AbstractUserCompany(models.Model):
         verbose_name_plural = 'Пользователи компании | Company users'
         abstract = True
 
+    @property
+    def is_owner(self):
+        """
+        Является ли участник владельцем компании (по полю владельца компании)
+        :return: bool
+        """
+        return self.company.owner_id == self.user_id
+
     def block(self):
         """
         Заблокировать участника в компании
         :return: (bool, str)
         """
-        if self.company.owner == self.user:
+        if self.is_owner:
             return False, _('Нельзя заблокировать владельца компании')
         self.is_blocked = True
         self.save()
@@ -61,7 +69,7 @@ class AbstractUserCompany(models.Model):
         Удалить участника в компании
         :return: (bool, str)
         """
-        if self.company.owner == self.user:
+        if self.is_owner:
             return False, _('Нельзя удалить владельца компании')
         self.delete()
         return True, None
@@ -72,7 +80,7 @@ class AbstractUserCompany(models.Model):
         :return: (bool, str)
         """
         company_role_service = UserCompanyRoleService()
-        if self.company.owner == self.user:
+        if self.is_owner:
             return False, _('Нельзя сменить роль владельца компании')
         if role == company_role_service.get_owner_role():
             return False, _('Нельзя сделать пользователя владельцем. Воспользуйтесь функционалом смены владельца')
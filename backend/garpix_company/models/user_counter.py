@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+User = get_user_model()
+
+
+class UserCompanyCounter(models.Model):
+    """
+    Денормализованное количество компаний пользователя.
+    Строка создается при первом чтении и поддерживается сервисом счетчиков.
+    """
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name='company_counter',
+                                verbose_name=_('Пользователь'))
+    companies_count = models.IntegerField(default=0, verbose_name=_('Количество компаний'))
+
+    class Meta:
+        verbose_name = 'Счетчик компаний пользователя | User companies counter'
+        verbose_name_plural = 'Счетчики компаний пользователей | User companies counters'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.companies_count}'
@@ -0,0 +1,51 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class CompanyCursorPagination(CursorPagination):
+    """
+    Постраничный вывод компаний по курсору (без COUNT и OFFSET)
+    """
+    ordering = ('-id',)
+    page_size = getattr(settings, 'GARPIX_COMPANY_COMPANIES_PAGE_SIZE', 50)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'GARPIX_COMPANY_COMPANIES_MAX_PAGE_SIZE', 500)
+
+
+class InviteCursorPagination(CursorPagination):
+    """
+    Постраничный вывод инвайтов компании по курсору (без COUNT и OFFSET)
+    """
+    ordering = ('-created_at', '-id')
+    page_size = getattr(settings, 'GARPIX_COMPANY_INVITES_PAGE_SIZE', 50)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'GARPIX_COMPANY_INVITES_MAX_PAGE_SIZE', 500)
+
+
+class MemberCursorPagination(CursorPagination):
+    """
+    Постраничный вывод участников компании по курсору.
+    Общее количество не считается, если не передан параметр with_count
+    """
+    ordering = ('-created_at', '-id')
+    page_size = getattr(settings, 'GARPIX_COMPANY_MEMBERS_PAGE_SIZE', 50)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'GARPIX_COMPANY_MEMBERS_MAX_PAGE_SIZE', 500)
+    count_query_param = 'with_count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true', 'True'):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data['count'] = self.count
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {'type': 'integer', 'example': 123}
+        return response_schema
@@ -1,10 +1,12 @@
+from django.db.models import Exists, OuterRef, Q
 from rest_framework import permissions
 
-from garpix_company.models import get_company_model, get_user_company_model, InviteToCompany
-from garpix_company.services.role_service import UserCompanyRoleService
+from garpix_company.models import get_company_model, get_user_company_model, get_company_role_model, InviteToCompany
+from garpix_company.services.membership_service import get_company_membership
 
 Company = get_company_model()
 UserCompany = get_user_company_model()
+CompanyRole = get_company_role_model()
 
 
 class CompanyAdminOnly(permissions.BasePermission):
@@ -13,12 +15,17 @@ class CompanyAdminOnly(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        company_role_service = UserCompanyRoleService()
-
+        if not request.user.is_authenticated:
+            return False
         if isinstance(obj, Company):
-            return request.user.is_authenticated and request.user.id in UserCompany.active_objects.filter(
-                role=company_role_service.get_admin_role(), company=obj).values_list('user', flat=True)
+            return get_company_membership(request, obj).is_admin
         if isinstance(obj, InviteToCompany) or isinstance(obj, UserCompany):
-            return request.user.is_authenticated and UserCompany.active_objects.filter(
-                role=company_role_service.get_admin_role(), user=request.user, company=obj.company)
+            return get_company_membership(request, obj.company_id).is_admin
         return False
+
+    def get_company_filter(self, user):
+        """
+        Условие на компании, в которых пользователь - администратор
+        """
+        return Q(Exists(UserCompany.active_objects.filter(
+            company=OuterRef('pk'), user=user, role__role_type=CompanyRole.ROLE_TYPE.ADMIN)))
@@ -1,6 +1,8 @@
+from django.db.models import Q
 from rest_framework import permissions
 
 from garpix_company.models import get_company_model, get_user_company_model, InviteToCompany
+from garpix_company.services.membership_service import get_company_membership
 
 Company = get_company_model()
 UserCompany = get_user_company_model()
@@ -12,9 +14,16 @@ class CompanyOwnerOnly(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-
+        if not request.user.is_authenticated:
+            return False
         if isinstance(obj, Company):
-            return request.user.is_authenticated and request.user == obj.owner
+            return obj.is_owner(request.user)
         if isinstance(obj, UserCompany) or isinstance(obj, InviteToCompany):
-            return request.user.is_authenticated and request.user == obj.company.owner
+            return get_company_membership(request, obj.company_id).is_owner
         return False
+
+    def get_company_filter(self, user):
+        """
+        Условие на компании, в которых пользователь - владелец
+        """
+        return Q(owner=user)
@@ -1,6 +1,8 @@
+from django.db.models import Exists, OuterRef, Q
 from rest_framework import permissions
 
 from garpix_company.models import get_company_model, get_user_company_model
+from garpix_company.services.membership_service import get_company_membership
 
 Company = get_company_model()
 UserCompany = get_user_company_model()
@@ -12,5 +14,10 @@ class CompanyUserOnly(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        return request.user.is_authenticated and request.user.id in UserCompany.active_objects.filter(
-            company=obj).values_list('user', flat=True)
+        return request.user.is_authenticated and get_company_membership(request, obj).is_member
+
+    def get_company_filter(self, user):
+        """
+        Условие на компании, в которых пользователь - активный участник
+        """
+        return Q(Exists(UserCompany.active_objects.filter(company=OuterRef('pk'), user=user)))
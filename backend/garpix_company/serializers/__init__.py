@@ -1,3 +1,5 @@
-from .company import CompanySerializer, CreateCompanySerializer, UpdateCompanySerializer, ChangeOwnerCompanySerializer
-from .invite import InviteToCompanySerializer, CreateAndInviteToCompanySerializer, InvitesSerializer
+from .company import CompanySerializer, CreateCompanySerializer, UpdateCompanySerializer, ChangeOwnerCompanySerializer, \
+    CompanyLookupSerializer, CompanyLookupBatchSerializer, CompanyBulkStatusSerializer, CompanyMembershipShortSerializer
+from .invite import InviteToCompanySerializer, CreateAndInviteToCompanySerializer, InvitesSerializer, \
+    BulkInviteToCompanySerializer, InviteImportSerializer
 from .user import GarpixCompanyUserSerializer
@@ -1,4 +1,5 @@
-from django.db import transaction
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
@@ -7,6 +8,9 @@ from garpix_company.models.user_company import get_user_company_model
 from django.utils.translation import gettext_lazy as _
 
 from garpix_company.models.user_role import get_company_role_model
+from garpix_company.services.company_limit_service import check_user_companies_limit
+from garpix_company.services.company_lookup_service import find_duplicate_companies, is_unique_inn_required
+from garpix_company.services.company_status_service import COMPANY_STATUS_TRANSITIONS
 from garpix_company.services.role_service import UserCompanyRoleService
 
 Company = get_company_model()
@@ -26,13 +30,66 @@ class ExtraFieldsCompanySerializerMixin(serializers.Serializer):
 
 
 class CompanySerializer(ExtraFieldsCompanySerializerMixin, serializers.ModelSerializer):
+    """
+    Поля владельца и роли текущего пользователя заполняются из аннотаций
+    CompanyQuerySet (with_owner, with_user_role) или annotate_company_membership и пропускаются, если их нет.
+    Количество участников и инвайтов берется из полей-счетчиков компании
+    """
+
+    owner_email = serializers.EmailField(read_only=True)
+    user_role_id = serializers.IntegerField(read_only=True)
+    user_role_type = serializers.CharField(read_only=True)
+    user_is_blocked = serializers.BooleanField(read_only=True)
+    user_is_owner = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = Company
         exclude = ('participants',)
 
 
-class CreateCompanySerializer(ExtraFieldsCompanySerializerMixin, serializers.ModelSerializer):
+class CompanyMembershipShortSerializer(serializers.ModelSerializer):
+    """
+    Компания, к данным которой у участника нет доступа (участник заблокирован или компания не активна):
+    только название, статус и роль пользователя
+    """
+
+    user_role_id = serializers.IntegerField(read_only=True)
+    user_role_type = serializers.CharField(read_only=True)
+    user_is_blocked = serializers.BooleanField(read_only=True)
+    user_is_owner = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Company
+        fields = ('id', 'title', 'status', 'user_role_id', 'user_role_type', 'user_is_blocked', 'user_is_owner')
+
+
+class UniqueCompanySerializerMixin(serializers.Serializer):
+    """
+    Проверка дубликатов компании по ИНН и ОГРН (GARPIX_COMPANY_UNIQUE_INN)
+    """
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if is_unique_inn_required():
+            self.validate_duplicates(attrs)
+        return attrs
+
+    def validate_duplicates(self, attrs):
+        instance_pk = self.instance.pk if self.instance is not None else None
+        inn = attrs.get('inn', getattr(self.instance, 'inn', None))
+        ogrn = attrs.get('ogrn', getattr(self.instance, 'ogrn', None))
+        duplicates = set(find_duplicate_companies(inn, ogrn, exclude_pk=instance_pk).values_list('inn', 'ogrn'))
+        errors = {}
+        if inn and any(duplicate_inn == inn for duplicate_inn, _duplicate_ogrn in duplicates):
+            errors['inn'] = [_('Компания с указанным ИНН уже зарегистрирована')]
+        if ogrn and any(duplicate_ogrn == ogrn for _duplicate_inn, duplicate_ogrn in duplicates):
+            errors['ogrn'] = [_('Компания с указанным ОГРН уже зарегистрирована')]
+        if errors:
+            raise ValidationError(errors)
+
+
+class CreateCompanySerializer(UniqueCompanySerializerMixin, ExtraFieldsCompanySerializerMixin,
+                              serializers.ModelSerializer):
 
     user_by = serializers.HiddenField(default=serializers.CurrentUserDefault())
 
@@ -46,12 +103,20 @@ class CreateCompanySerializer(ExtraFieldsCompanySerializerMixin, serializers.Mod
         }
 
     def validate_user_by(self, value):
-        Company = get_company_model()
-        if not Company.check_user_companies_limit(value):
+        if not check_user_companies_limit(value, self.context.get('request')):
             raise ValidationError(_('У вас превышен лимит количества компаний'))
         return value
 
     def create(self, validated_data):
+        try:
+            return self._create(validated_data)
+        except IntegrityError:
+            # конкурентное создание компании с тем же ИНН/ОГРН при уникальном ограничении
+            if is_unique_inn_required():
+                self.validate_duplicates(validated_data)
+            raise
+
+    def _create(self, validated_data):
         with transaction.atomic():
 
             company_role_service = UserCompanyRoleService()
@@ -63,6 +128,7 @@ class CreateCompanySerializer(ExtraFieldsCompanySerializerMixin, serializers.Mod
             # creating
             validated_data.pop('user_by')
             obj = Company(
+                owner=user,
                 **validated_data
             )
             obj.save()
@@ -71,7 +137,8 @@ class CreateCompanySerializer(ExtraFieldsCompanySerializerMixin, serializers.Mod
         return obj
 
 
-class UpdateCompanySerializer(ExtraFieldsCompanySerializerMixin, serializers.ModelSerializer):
+class UpdateCompanySerializer(UniqueCompanySerializerMixin, ExtraFieldsCompanySerializerMixin,
+                              serializers.ModelSerializer):
     class Meta:
         model = Company
         fields = (
@@ -97,3 +164,28 @@ class ChangeOwnerCompanySerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'role': {'required': False}
         }
+
+
+class CompanyLookupSerializer(serializers.Serializer):
+    """
+    Результат проверки дубликатов: есть ли компании с такими ИНН/ОГРН и их id (без данных чужих компаний)
+    """
+    exists = serializers.BooleanField()
+    ids = serializers.ListField(child=serializers.IntegerField())
+
+
+class CompanyLookupBatchSerializer(serializers.Serializer):
+    inns = serializers.ListField(
+        child=serializers.CharField(max_length=15),
+        allow_empty=False,
+        max_length=getattr(settings, 'GARPIX_COMPANY_LOOKUP_BATCH_MAX_SIZE', 1000)
+    )
+
+
+class CompanyBulkStatusSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=getattr(settings, 'GARPIX_COMPANY_BULK_STATUS_MAX_SIZE', 10000)
+    )
+    transition = serializers.ChoiceField(choices=COMPANY_STATUS_TRANSITIONS)
@@ -7,10 +7,10 @@ from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from garpix_company.models import get_user_company_model
-from garpix_company.models.company import get_company_model
 from garpix_company.models.invite import InviteToCompany
 from django.utils.translation import gettext_lazy as _
 from garpix_company.models.user_role import get_company_role_model
+from garpix_company.services.company_limit_service import check_user_companies_limit
 
 
 RoleSerializer = import_string(getattr(settings, 'GARPIX_COMPANY_ROLE_SERIALIZER', 'garpix_company.serializers.role.GarpixCompanyRoleSerializer'))
@@ -28,11 +28,10 @@ class InviteToCompanySerializer(serializers.ModelSerializer):
 
     def validate_email(self, value):
         User = get_user_model()
-        Company = get_company_model()
         company_id = self.context.get("company_id")
         try:
             user = User.objects.get(email=value)
-            if not Company.check_user_companies_limit(user):
+            if not check_user_companies_limit(user, self.context.get('request')):
                 raise ValidationError(_('У пользователя с указанным email превышен лимит количества компаний'))
             if UserCompany.active_objects.filter(user=user, company_id=company_id).exists():
                 raise ValidationError(_('Указанный пользователь уже является сотрудником компании'))
@@ -42,9 +41,8 @@ class InviteToCompanySerializer(serializers.ModelSerializer):
         return value
 
     def validate_user(self, value):
-        Company = get_company_model()
         company_id = self.context.get("company_id")
-        if not Company.check_user_companies_limit(value):
+        if not check_user_companies_limit(value, self.context.get('request')):
             raise ValidationError(_('У пользователя с указанным id превышен лимит количества компаний'))
         if UserCompany.active_objects.filter(user=value, company_id=company_id).exists():
             raise ValidationError(_('Указанный пользователь уже является сотрудником компании'))
@@ -93,7 +91,7 @@ class CreateAndInviteToCompanySerializer(serializers.ModelSerializer):
 
     def validate_email(self, value):
         User = get_user_model()
-        if User.objects.filter(email=value).first():
+        if User.objects.filter(email=value).exists():
             raise ValidationError(_('Пользователь с указанным email уже зарегистрирован'))
         return value
 
@@ -131,3 +129,21 @@ class InvitesSerializer(serializers.ModelSerializer):
     class Meta:
         model = InviteToCompany
         fields = '__all__'
+
+
+class BulkInviteRowSerializer(serializers.Serializer):
+    email = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    user = serializers.IntegerField(required=False, allow_null=True)
+    role = serializers.IntegerField()
+
+
+class BulkInviteToCompanySerializer(serializers.Serializer):
+    invites = serializers.ListField(
+        child=BulkInviteRowSerializer(),
+        allow_empty=False,
+        max_length=getattr(settings, 'GARPIX_COMPANY_BULK_INVITE_MAX_SIZE', 2000)
+    )
+
+
+class InviteImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
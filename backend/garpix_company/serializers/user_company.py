@@ -28,3 +28,15 @@ class ChangeUserRoleSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'role': {'required': False}
         }
+
+
+class BulkUserCompanySerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=getattr(settings, 'GARPIX_COMPANY_BULK_MEMBERS_MAX_SIZE', 1000)
+    )
+
+
+class BulkChangeUserRoleSerializer(BulkUserCompanySerializer):
+    role = serializers.IntegerField()
@@ -0,0 +1,66 @@
+from django.db.models import Q
+from rest_framework import permissions
+
+
+ALLOW = Q(pk__isnull=False)
+DENY = Q(pk__in=[])
+
+# составные права: тип -> функция (условие op1, условие op2) -> условие
+OPERAND_FILTERS = {
+    permissions.OR: lambda op1, op2: op1 | op2,
+    permissions.AND: lambda op1, op2: op1 & op2,
+    permissions.NOT: lambda op1, op2: ~op1,
+}
+
+# права DRF без метода get_company_filter: тип -> функция (пользователь) -> разрешено ли
+USER_PERMISSIONS = {
+    permissions.IsAdminUser: lambda user: user.is_staff,
+    permissions.IsAuthenticated: lambda user: user.is_authenticated,
+    permissions.AllowAny: lambda user: True,
+}
+
+
+def get_permission_company_filter(permission, user):
+    """
+    Условие на компании, эквивалентное проверке прав permission для пользователя user.
+    Поддерживает составные права (|, &, ~) и права garpix_company с методом get_company_filter.
+    Неизвестные права запрещают доступ.
+    :return: Q
+    """
+    for permission_class, combine in OPERAND_FILTERS.items():
+        if isinstance(permission, permission_class):
+            op2 = getattr(permission, 'op2', None)
+            return combine(get_permission_company_filter(permission.op1, user),
+                           get_permission_company_filter(op2, user) if op2 is not None else None)
+    if hasattr(permission, 'get_company_filter'):
+        return permission.get_company_filter(user) if user.is_authenticated else DENY
+    for permission_class, is_allowed in USER_PERMISSIONS.items():
+        if isinstance(permission, permission_class):
+            return ALLOW if is_allowed(user) else DENY
+    return DENY
+
+
+def authorized_companies(user, action, company_ids=None, view_class=None):
+    """
+    Компании, в которых пользователь может выполнить действие action CompanyViewSet.
+    Строится одним запросом по тем же правам, что и permission_classes_by_action.
+    :param user: пользователь
+    :param action: действие CompanyViewSet (retrieve, invite, change_owner, ...)
+    :param company_ids: ограничить проверку списком id компаний
+    :param view_class: класс представления (по умолчанию CompanyViewSet)
+    :return: QuerySet
+    """
+    if view_class is None:
+        from garpix_company.views.company import CompanyViewSet
+        view_class = CompanyViewSet
+
+    permission_classes = view_class.permission_classes_by_action.get(action, view_class.permission_classes)
+
+    condition = Q()
+    for permission_class in permission_classes:
+        condition &= get_permission_company_filter(permission_class(), user)
+
+    queryset = view_class.queryset.all()
+    if company_ids is not None:
+        queryset = queryset.filter(pk__in=company_ids)
+    return queryset.filter(condition)
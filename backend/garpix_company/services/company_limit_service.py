@@ -0,0 +1,29 @@
+from garpix_company.models.company import get_company_model
+
+
+def check_users_companies_limit(users, request=None):
+    """
+    Проверка лимита количества компаний для нескольких пользователей через Company.check_users_companies_limit.
+    Результаты кэшируются на объекте запроса
+    :param users: пользователи
+    :param request: запрос (для кэширования в рамках запроса)
+    :return: словарь {id пользователя: bool}
+    """
+    users = {user.pk: user for user in users}
+    limits = getattr(request, '_garpix_company_limits', None) if request is not None else None
+    if limits is None:
+        limits = {}
+        if request is not None:
+            request._garpix_company_limits = limits
+    missing = [user for pk, user in users.items() if pk not in limits]
+    if missing:
+        limits.update(get_company_model().check_users_companies_limit(missing))
+    return {pk: limits[pk] for pk in users}
+
+
+def check_user_companies_limit(user, request=None):
+    """
+    Проверка лимита количества компаний пользователя с кэшированием в рамках запроса
+    :return: bool
+    """
+    return check_users_companies_limit([user], request)[user.pk]
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.db.models import Q
+
+from garpix_company.helpers import COMPANY_STATUS_ENUM
+from garpix_company.models.company import get_company_model
+
+
+def lookup_companies(inn=None, ogrn=None):
+    """
+    Поиск неудаленных компаний по точному совпадению ИНН и/или ОГРН
+    :return: QuerySet
+    """
+    condition = Q()
+    if inn:
+        condition &= Q(inn=inn)
+    if ogrn:
+        condition &= Q(ogrn=ogrn)
+    if not condition:
+        return get_company_model().objects.none()
+    return get_company_model().objects.exclude(status=COMPANY_STATUS_ENUM.DELETED).filter(condition)
+
+
+def lookup_companies_by_inns(inns):
+    """
+    Поиск неудаленных компаний по списку ИНН одним запросом
+    :return: словарь {ИНН: список id компаний}
+    """
+    result = {inn: [] for inn in inns}
+    companies = get_company_model().objects.exclude(status=COMPANY_STATUS_ENUM.DELETED).filter(
+        inn__in=result.keys()).order_by('pk').values_list('inn', 'pk')
+    for inn, pk in companies:
+        result[inn].append(pk)
+    return result
+
+
+def find_duplicate_companies(inn=None, ogrn=None, exclude_pk=None):
+    """
+    Неудаленные компании с тем же ИНН или ОГРН
+    :return: QuerySet
+    """
+    condition = Q(pk__in=[])
+    if inn:
+        condition |= Q(inn=inn)
+    if ogrn:
+        condition |= Q(ogrn=ogrn)
+    queryset = get_company_model().objects.exclude(status=COMPANY_STATUS_ENUM.DELETED).filter(condition)
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return queryset
+
+
+def is_unique_inn_required():
+    return getattr(settings, 'GARPIX_COMPANY_UNIQUE_INN', False)
@@ -0,0 +1,113 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from garpix_company.helpers import CHOICES_INVITE_STATUS_ENUM, COMPANY_STATUS_ENUM
+from garpix_company.services.counter_service import apply_members_removed, counters_suspended, \
+    update_company_counters
+
+logger = logging.getLogger(__name__)
+
+
+def get_purgeable_companies(retention_days=None):
+    """
+    Удаленные компании, срок хранения которых истек (по дате изменения, т.е. дате перехода в статус deleted)
+    :param retention_days: срок хранения в днях (GARPIX_COMPANY_DELETED_RETENTION_DAYS)
+    :return: QuerySet
+    """
+    from garpix_company.models.company import get_company_model
+
+    if retention_days is None:
+        retention_days = getattr(settings, 'GARPIX_COMPANY_DELETED_RETENTION_DAYS', 30)
+    return get_company_model().objects.filter(
+        status=COMPANY_STATUS_ENUM.DELETED, updated_at__lt=timezone.now() - timedelta(days=retention_days))
+
+
+class CompanyPurgeService:
+    """
+    Окончательное удаление компаний в статусе deleted.
+    Участники и инвайты компании удаляются порциями, каждая порция - в отдельной транзакции,
+    строка компании удаляется последней. Прерванную очистку можно запустить повторно:
+    уже удаленные порции не обрабатываются снова.
+    """
+
+    def __init__(self, chunk_size=None, sleep=None):
+        self.chunk_size = chunk_size or getattr(settings, 'GARPIX_COMPANY_PURGE_CHUNK_SIZE', 1000)
+        self.sleep = getattr(settings, 'GARPIX_COMPANY_PURGE_SLEEP', 0.1) if sleep is None else sleep
+        self.stats = {'companies': 0, 'members': 0, 'invites': 0, 'chunks': 0, 'seconds': 0.0}
+
+    def purge(self, retention_days=None, max_companies=None, progress=None):
+        """
+        Удалить компании с истекшим сроком хранения
+        :param retention_days: срок хранения в днях
+        :param max_companies: максимальное количество компаний за вызов
+        :param progress: функция, вызываемая со статистикой после каждой компании
+        :return: статистика {companies, members, invites, chunks, seconds}
+        """
+        started = time.monotonic()
+        company_ids = get_purgeable_companies(retention_days).order_by('pk').values_list('pk', flat=True)
+        if max_companies is not None:
+            company_ids = company_ids[:max_companies]
+        for company_id in list(company_ids):
+            self.purge_company(company_id)
+            self.stats['seconds'] = round(time.monotonic() - started, 3)
+            if progress is not None:
+                progress(company_id, self.stats)
+        self.stats['seconds'] = round(time.monotonic() - started, 3)
+        logger.info('Purged deleted companies: %s', self.stats)
+        return self.stats
+
+    def purge_company(self, company_id):
+        """
+        Удалить компанию в статусе deleted вместе с участниками и инвайтами
+        :return: True, если компания удалена
+        """
+        from garpix_company.models.company import get_company_model
+        from garpix_company.models.invite import InviteToCompany
+        from garpix_company.models.user_company import get_user_company_model
+
+        UserCompany = get_user_company_model()
+        deleted = {'company_id': company_id, 'company__status': COMPANY_STATUS_ENUM.DELETED}
+
+        while self._chunk(UserCompany.objects.filter(**deleted), self._delete_members, 'members'):
+            pass
+        while self._chunk(InviteToCompany.objects.filter(**deleted), self._delete_invites, 'invites'):
+            pass
+
+        with transaction.atomic(), counters_suspended():
+            count, _deleted = get_company_model().objects.filter(
+                pk=company_id, status=COMPANY_STATUS_ENUM.DELETED).delete()
+        if count:
+            self.stats['companies'] += 1
+        return bool(count)
+
+    def _chunk(self, queryset, delete, stat):
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:self.chunk_size])
+        if not ids:
+            return False
+        with transaction.atomic(), counters_suspended():
+            self.stats[stat] += delete(queryset.model.objects.filter(pk__in=ids))
+        self.stats['chunks'] += 1
+        if self.sleep:
+            time.sleep(self.sleep)
+        return True
+
+    def _delete_members(self, queryset):
+        members = list(queryset.select_for_update().values_list('company_id', 'user_id', 'is_blocked'))
+        queryset.delete()
+        if members:
+            apply_members_removed(members[0][0],
+                                  [(user_id, is_blocked) for _company_id, user_id, is_blocked in members])
+        return len(members)
+
+    def _delete_invites(self, queryset):
+        invites = list(queryset.select_for_update().values_list('company_id', 'status'))
+        queryset.delete()
+        if invites:
+            pending = sum(1 for _company_id, status in invites if status == CHOICES_INVITE_STATUS_ENUM.CREATED)
+            update_company_counters(invites[0][0], pending=-pending)
+        return len(invites)
@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from garpix_company.models.company import get_company_model
+from garpix_company.signals import company_status_bulk_changed
+
+COMPANY_STATUS_TRANSITIONS = ('comp_banned', 'comp_active', 'comp_deleted')
+
+
+class CompanyStatusTransitionError(ValueError):
+    pass
+
+
+def get_transition_states(transition_name):
+    """
+    Исходные и целевой статусы перехода django_fsm модели компании
+    :param transition_name: имя перехода (comp_banned, comp_active, comp_deleted)
+    :return: (список исходных статусов, целевой статус)
+    """
+    Company = get_company_model()
+    if transition_name not in COMPANY_STATUS_TRANSITIONS:
+        raise CompanyStatusTransitionError(_('Неизвестный переход статуса компании'))
+
+    transitions = getattr(Company, transition_name)._django_fsm.transitions
+    states = {choice[0] for choice in Company.COMPANY_STATUS.CHOICES}
+    targets = {item.target for item in transitions.values()}
+    if len(targets) != 1 or any(item.conditions for item in transitions.values()):
+        # переходы с условиями или несколькими целевыми статусами проверяются только на экземпляре
+        raise CompanyStatusTransitionError(_('Переход статуса компании нельзя выполнить массово'))
+    target = targets.pop()
+
+    sources = set()
+    for source in transitions:
+        if source == '*':
+            sources |= states
+        elif source == '+':
+            sources |= states - {target}
+        else:
+            sources.add(source)
+    return sorted(sources), target
+
+
+class BulkCompanyStatusService:
+    """
+    Массовая смена статуса компаний по переходам django_fsm модели компании.
+    Допустимость перехода проверяется в SQL (UPDATE ... WHERE status IN (...)),
+    на порцию - один запрос на чтение, один UPDATE и один сигнал company_status_bulk_changed.
+    """
+
+    STATUS_SUCCESS = 'success'
+    STATUS_ERROR = 'error'
+
+    def __init__(self, transition_name, batch_size=None):
+        self.transition_name = transition_name
+        self.sources, self.target = get_transition_states(transition_name)
+        self.batch_size = batch_size or getattr(settings, 'GARPIX_COMPANY_BULK_STATUS_BATCH_SIZE', 1000)
+        self.Company = get_company_model()
+
+    def apply(self, ids):
+        """
+        Выполнить переход для компаний
+        :param ids: список id компаний
+        :return: список результатов по id в исходном порядке
+        """
+        ids = list(dict.fromkeys(ids))
+        errors = {}
+        for start in range(0, len(ids), self.batch_size):
+            errors.update(self._apply_batch(ids[start:start + self.batch_size]))
+
+        return [
+            {
+                'id': pk,
+                'status': self.STATUS_ERROR if pk in errors else self.STATUS_SUCCESS,
+                'errors': [str(errors[pk])] if pk in errors else [],
+            }
+            for pk in ids
+        ]
+
+    def apply_queryset(self, queryset):
+        """
+        Выполнить переход для компаний из queryset (например, выбранных в админке)
+        :return: количество измененных компаний
+        """
+        ids = list(queryset.order_by().values_list('pk', flat=True))
+        return sum(1 for result in self.apply(ids) if result['status'] == self.STATUS_SUCCESS)
+
+    def _apply_batch(self, ids):
+        """
+        :return: словарь ошибок {id компании: сообщение}
+        """
+        with transaction.atomic():
+            statuses = dict(self.Company.objects.filter(pk__in=ids).select_for_update().values_list('pk', 'status'))
+            changed = [pk for pk in ids if statuses.get(pk) in self.sources]
+            if changed:
+                self.Company.objects.filter(pk__in=changed, status__in=self.sources).update(
+                    status=self.target, updated_at=timezone.now())
+                transaction.on_commit(lambda: company_status_bulk_changed.send(
+                    sender=self.Company, company_ids=changed, transition=self.transition_name,
+                    source=self.sources, target=self.target
+                ))
+        return {
+            pk: _('Компания не найдена') if pk not in statuses else _('Переход недоступен из текущего статуса компании')
+            for pk in ids if statuses.get(pk) not in self.sources
+        }
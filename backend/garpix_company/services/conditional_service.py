@@ -0,0 +1,78 @@
+import hashlib
+
+from django.conf import settings
+from django.utils import timezone, translation
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def is_conditional_get_enabled():
+    return getattr(settings, 'GARPIX_COMPANY_CONDITIONAL_GET', True)
+
+
+def get_company_last_modified(company):
+    """
+    Дата последнего изменения компании, ее участников или инвайтов
+    :return: datetime
+    """
+    if company.membership_updated_at is None:
+        return company.updated_at
+    return max(company.updated_at, company.membership_updated_at)
+
+
+def get_http_last_modified(company):
+    """
+    Last-Modified с точностью до секунды (точность даты HTTP).
+    Пока секунда последнего изменения не прошла, в ту же секунду возможно еще одно изменение
+    с той же датой HTTP, поэтому до ее окончания Last-Modified не используется (RFC 9110, 8.8.2.2)
+    и актуальность проверяется только по ETag
+    :return: int (timestamp) | None
+    """
+    last_modified = int(get_company_last_modified(company).timestamp())
+    if timezone.now().timestamp() < last_modified + 1:
+        return None
+    return last_modified
+
+
+def get_company_etag(request, company, weak=False, extra=()):
+    """
+    ETag ответа по данным компании: дата изменения (с полной точностью) и версия состава компании,
+    пользователь, формат и язык ответа, путь с параметрами запроса
+    :param weak: слабый ETag (ответ зависит от данных, не учтенных в версии, например профилей пользователей)
+    :param extra: значения из ответа, не учтенные в версии компании (например, email владельца)
+    :return: str
+    """
+    renderer = getattr(request, 'accepted_renderer', None)
+    key = '|'.join(str(part) for part in (
+        company.pk, company.updated_at.isoformat(), company.membership_version, request.user.pk,
+        getattr(renderer, 'format', ''), translation.get_language(), request.get_full_path(), *extra
+    ))
+    etag = '"%s"' % hashlib.md5(key.encode()).hexdigest()
+    return f'W/{etag}' if weak else etag
+
+
+def company_conditional_response(request, company, get_response, weak=False, extra=()):
+    """
+    Условный GET по данным компании (If-None-Match / If-Modified-Since).
+    Если данные не изменились, возвращает 304 без вызова get_response
+    :param get_response: функция, формирующая ответ
+    :param extra: значения из ответа, не учтенные в версии компании. Дата их изменения неизвестна,
+        поэтому с ними ответ проверяется только по ETag (без Last-Modified)
+    :return: Response
+    """
+    if not is_conditional_get_enabled():
+        return get_response()
+
+    etag = get_company_etag(request, company, weak, extra)
+    last_modified = None if extra else get_http_last_modified(company)
+    # If-None-Match проверяется первым, при его наличии If-Modified-Since не учитывается (RFC 9110, 13.2.2)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = get_response()
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # ответ зависит от пользователя и должен проверяться при каждом запросе
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
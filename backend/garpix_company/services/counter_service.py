@@ -0,0 +1,177 @@
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db.models import Count, F
+from django.utils import timezone
+
+from garpix_company.helpers import CHOICES_INVITE_STATUS_ENUM
+
+_counters_suspended = contextvars.ContextVar('garpix_company_counters_suspended', default=False)
+
+
+@contextmanager
+def counters_suspended():
+    """
+    Отключить обновление счетчиков сигналами (массовые операции обновляют счетчики сами)
+    """
+    token = _counters_suspended.set(True)
+    try:
+        yield
+    finally:
+        _counters_suspended.reset(token)
+
+
+def update_company_counters(company_id, active=0, blocked=0, pending=0):
+    """
+    Изменить счетчики компании одним UPDATE.
+    Вызывается при любом изменении участников и инвайтов компании, поэтому также увеличивает
+    версию состава компании (membership_version) и дату ее изменения (membership_updated_at)
+    :param company_id: id компании
+    :param active: изменение количества активных участников
+    :param blocked: изменение количества заблокированных участников
+    :param pending: изменение количества ожидающих инвайтов
+    """
+    from garpix_company.models.company import get_company_model
+
+    if company_id is None:
+        return
+    fields = {'membership_version': F('membership_version') + 1, 'membership_updated_at': timezone.now()}
+    for field, delta in (('active_members_count', active), ('blocked_members_count', blocked),
+                         ('pending_invites_count', pending)):
+        if delta:
+            fields[field] = F(field) + delta
+    get_company_model().objects.filter(pk=company_id).update(**fields)
+
+
+def update_user_counters(user_deltas):
+    """
+    Изменить счетчики компаний пользователей (одним UPDATE на каждое значение изменения)
+    :param user_deltas: словарь {id пользователя: изменение}
+    """
+    from garpix_company.models.user_counter import UserCompanyCounter
+
+    users_by_delta = defaultdict(list)
+    for user_id, delta in user_deltas.items():
+        if delta and user_id is not None:
+            users_by_delta[delta].append(user_id)
+    for delta, user_ids in users_by_delta.items():
+        UserCompanyCounter.objects.filter(user_id__in=user_ids).update(companies_count=F('companies_count') + delta)
+
+
+def get_users_companies_counts(user_ids):
+    """
+    Количество компаний пользователей. Отсутствующие счетчики считаются одним запросом и сохраняются
+    :return: словарь {id пользователя: количество компаний}
+    """
+    from garpix_company.models.user_company import get_user_company_model
+    from garpix_company.models.user_counter import UserCompanyCounter
+
+    user_ids = set(user_ids)
+    counts = dict(UserCompanyCounter.objects.filter(user_id__in=user_ids).values_list('user_id', 'companies_count'))
+    missing = user_ids - set(counts)
+    if missing:
+        actual = dict(get_user_company_model().objects.filter(user_id__in=missing).order_by().values(
+            'user').annotate(count=Count('pk')).values_list('user', 'count'))
+        UserCompanyCounter.objects.bulk_create(
+            [UserCompanyCounter(user_id=user_id, companies_count=actual.get(user_id, 0)) for user_id in missing],
+            ignore_conflicts=True
+        )
+        counts.update({user_id: actual.get(user_id, 0) for user_id in missing})
+    return counts
+
+
+def get_user_companies_count(user):
+    """
+    Количество компаний пользователя
+    """
+    return get_users_companies_counts([user.pk])[user.pk]
+
+
+def apply_members_removed(company_id, members):
+    """
+    Обновить счетчики после удаления участников без сигналов
+    :param members: список пар (id пользователя, заблокирован)
+    """
+    blocked = sum(1 for _user_id, is_blocked in members if is_blocked)
+    update_company_counters(company_id, active=blocked - len(members), blocked=-blocked)
+    update_user_counters({user_id: -1 for user_id, _is_blocked in members})
+
+
+def _member_state(instance):
+    return (instance.__dict__.get('company_id'), instance.__dict__.get('user_id'),
+            instance.__dict__.get('is_blocked'))
+
+
+def _invite_state(instance):
+    return instance.__dict__.get('company_id'), instance.__dict__.get('status')
+
+
+def _member_deltas(state, sign):
+    company_id, user_id, is_blocked = state
+    update_company_counters(company_id, active=0 if is_blocked else sign, blocked=sign if is_blocked else 0)
+    update_user_counters({user_id: sign})
+
+
+def remember_member_state(sender, instance, **kwargs):
+    instance._counter_state = _member_state(instance)
+
+
+def update_member_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    state = _member_state(instance)
+    previous = getattr(instance, '_counter_state', None)
+    instance._counter_state = state
+    if raw or _counters_suspended.get():
+        return
+    if created:
+        _member_deltas(state, 1)
+        return
+    if previous is None or None in previous or previous == state:
+        update_company_counters(state[0])
+        return
+    company_id, user_id, is_blocked = state
+    previous_company_id, previous_user_id, previous_is_blocked = previous
+    if (company_id, user_id) == (previous_company_id, previous_user_id):
+        delta = 1 if is_blocked else -1
+        update_company_counters(company_id, active=-delta, blocked=delta)
+    else:
+        _member_deltas(previous, -1)
+        _member_deltas(state, 1)
+
+
+def update_member_counters_on_delete(sender, instance, **kwargs):
+    if _counters_suspended.get():
+        return
+    state = getattr(instance, '_counter_state', None) or _member_state(instance)
+    _member_deltas(state, -1)
+
+
+def remember_invite_state(sender, instance, **kwargs):
+    instance._counter_state = _invite_state(instance)
+
+
+def update_invite_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    state = _invite_state(instance)
+    previous = getattr(instance, '_counter_state', None)
+    instance._counter_state = state
+    if raw or _counters_suspended.get():
+        return
+    pending = CHOICES_INVITE_STATUS_ENUM.CREATED
+    if created:
+        update_company_counters(state[0], pending=int(state[1] == pending))
+        return
+    if previous is None or None in previous or previous == state:
+        update_company_counters(state[0])
+        return
+    if previous[0] != state[0]:
+        update_company_counters(previous[0], pending=-int(previous[1] == pending))
+        update_company_counters(state[0], pending=int(state[1] == pending))
+    else:
+        update_company_counters(state[0], pending=int(state[1] == pending) - int(previous[1] == pending))
+
+
+def update_invite_counters_on_delete(sender, instance, **kwargs):
+    if _counters_suspended.get():
+        return
+    company_id, status = getattr(instance, '_counter_state', None) or _invite_state(instance)
+    update_company_counters(company_id, pending=-1 if status == CHOICES_INVITE_STATUS_ENUM.CREATED else 0)
@@ -0,0 +1,47 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from garpix_company.services.counter_service import update_company_counters
+
+
+def expire_overdue_invites(batch_size=None, max_batches=None):
+    """
+    Перевести просроченные инвайты в статус expired.
+    Инвайты обходятся порциями по ключу (created_at, id), каждая порция обновляется в отдельной транзакции.
+    :param batch_size: размер порции (GARPIX_COMPANY_INVITE_EXPIRE_BATCH_SIZE)
+    :param max_batches: максимальное количество порций за вызов
+    :return: количество просроченных инвайтов
+    """
+    from garpix_company.models.invite import InviteToCompany
+
+    ttl = InviteToCompany.get_ttl()
+    if ttl is None:
+        return 0
+
+    batch_size = batch_size or getattr(settings, 'GARPIX_COMPANY_INVITE_EXPIRE_BATCH_SIZE', 1000)
+    created = InviteToCompany.CHOICES_INVITE_STATUS.CREATED
+    overdue = InviteToCompany.objects.filter(status=created, created_at__lt=timezone.now() - ttl)
+
+    total = 0
+    batches = 0
+    last = None
+    while max_batches is None or batches < max_batches:
+        queryset = overdue
+        if last is not None:
+            queryset = queryset.filter(Q(created_at__gt=last[0]) | Q(created_at=last[0], pk__gt=last[1]))
+        keys = list(queryset.order_by('created_at', 'pk').values_list('created_at', 'pk')[:batch_size])
+        if not keys:
+            break
+        with transaction.atomic():
+            batch = InviteToCompany.objects.filter(pk__in=[pk for _created_at, pk in keys], status=created)
+            companies = Counter(batch.select_for_update().values_list('company_id', flat=True))
+            total += batch.update(status=InviteToCompany.CHOICES_INVITE_STATUS.EXPIRED)
+            for company_id, count in companies.items():
+                update_company_counters(company_id, pending=-count)
+        last = keys[-1]
+        batches += 1
+    return total
@@ -0,0 +1,195 @@
+import codecs
+import csv
+import io
+import os
+from itertools import islice
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+from garpix_company.services.invite_service import BulkInviteService
+from garpix_company.services.role_service import role_registry
+
+CSV_ENCODING = 'utf-8-sig'
+ENCODING_CHECK_CHUNK_SIZE = 64 * 1024
+IMPORT_COLUMNS = ('email', 'user', 'role')
+RESULT_COLUMNS = ('row', 'email', 'user', 'status', 'invite', 'errors')
+
+
+class InviteImportError(ValueError):
+    pass
+
+
+def _to_id(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    return None
+
+
+def _normalize_header(header):
+    return [str(column or '').strip().lower() for column in header]
+
+
+def _validate_header(header):
+    if 'role' not in header or ('email' not in header and 'user' not in header):
+        raise InviteImportError(_('Файл должен содержать колонку role и колонку email или user'))
+
+
+def _rows_from_table(header, rows):
+    header = _normalize_header(header)
+    _validate_header(header)
+
+    def generator():
+        try:
+            for values in rows:
+                row = dict(zip(header, values))
+                yield {column: row.get(column) for column in IMPORT_COLUMNS}
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise InviteImportError(_('Ошибка чтения файла: %(error)s') % {'error': e})
+
+    return generator()
+
+
+def _validate_encoding(file):
+    """
+    Проверка кодировки файла порциями (файл не загружается в память целиком)
+    """
+    decoder = codecs.getincrementaldecoder(CSV_ENCODING)()
+    try:
+        for chunk in iter(lambda: file.read(ENCODING_CHECK_CHUNK_SIZE), b''):
+            decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        raise InviteImportError(_('Файл должен быть в кодировке UTF-8'))
+    finally:
+        file.seek(0)
+
+
+def read_csv_rows(file):
+    """
+    Построчное чтение CSV файла без загрузки в память целиком
+    """
+    _validate_encoding(file)
+    reader = csv.reader(io.TextIOWrapper(file, encoding=CSV_ENCODING, newline=''))
+    try:
+        header = next(reader, None)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise InviteImportError(_('Ошибка чтения файла: %(error)s') % {'error': e})
+    if header is None:
+        raise InviteImportError(_('Файл пуст'))
+    return _rows_from_table(header, reader)
+
+
+def read_xlsx_rows(file):
+    """
+    Построчное чтение XLSX файла (требуется openpyxl)
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise InviteImportError(_('Для импорта XLSX установите пакет openpyxl'))
+
+    rows = load_workbook(file, read_only=True, data_only=True).active.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        raise InviteImportError(_('Файл пуст'))
+    return _rows_from_table(header, rows)
+
+
+def read_invite_rows(file, filename=None):
+    """
+    Строки файла импорта инвайтов (CSV или XLSX по расширению)
+    :return: генератор словарей с ключами email, user и role
+    """
+    extension = os.path.splitext(filename or getattr(file, 'name', '') or '')[1].lower()
+    if extension == '.xlsx':
+        return read_xlsx_rows(file)
+    return read_csv_rows(file)
+
+
+class InviteImportService:
+    """
+    Импорт инвайтов из файла порциями через BulkInviteService
+    """
+
+    def __init__(self, company, chunk_size=None):
+        self.company = company
+        self.chunk_size = chunk_size or getattr(settings, 'GARPIX_COMPANY_INVITE_IMPORT_CHUNK_SIZE', 500)
+
+    def _prepare_row(self, row):
+        role = row.get('role')
+        role_id = _to_id(role)
+        if role_id is None and isinstance(role, str) and role.strip():
+            role_obj = role_registry.get_role_by_type(role.strip())
+            role_id = role_obj.pk if role_obj else None
+        email = row.get('email')
+        return {
+            'email': str(email).strip() if email is not None else None,
+            'user': _to_id(row.get('user')),
+            'role': role_id,
+        }
+
+    def _read_chunk(self, rows):
+        """
+        Очередная порция строк
+        :return: (порция, ошибка чтения файла или None)
+        """
+        chunk = []
+        try:
+            for row in islice(rows, self.chunk_size):
+                chunk.append(self._prepare_row(row))
+        except InviteImportError as e:
+            return chunk, e
+        return chunk, None
+
+    def process(self, rows):
+        """
+        Обработать строки импорта
+        :param rows: итератор строк
+        :return: генератор результатов по строкам (номер строки с учетом заголовка)
+        """
+        rows = iter(rows)
+        # пользователи и email, уже указанные в файле (повторы в следующих порциях - дубликаты)
+        seen = set()
+        offset = 0
+        while True:
+            chunk, error = self._read_chunk(rows)
+            if chunk:
+                for result in BulkInviteService(self.company).invite(chunk, seen=seen):
+                    result['row'] = offset + result.pop('index') + 2
+                    yield result
+            offset += len(chunk)
+            if error is not None:
+                yield {'row': offset + 2, 'email': None, 'user': None, 'status': BulkInviteService.STATUS_ERROR,
+                       'invite': None, 'errors': [str(error)]}
+                break
+            if not chunk:
+                break
+
+    def iter_csv(self, rows):
+        """
+        Результаты импорта в виде строк CSV
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush():
+            value = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            return value
+
+        writer.writerow(RESULT_COLUMNS)
+        yield flush()
+        for result in self.process(rows):
+            writer.writerow([
+                result['row'], result['email'] or '', result['user'] or '', result['status'],
+                result['invite'] or '', '; '.join(result['errors'])
+            ])
+            yield flush()
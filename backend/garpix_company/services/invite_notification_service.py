@@ -0,0 +1,46 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def send_invite_notifications(invite_ids):
+    """
+    Отправить уведомления по инвайтам в текущем процессе
+    :param invite_ids: id инвайтов
+    """
+    from garpix_company.models.invite import InviteToCompany
+
+    invites = InviteToCompany.objects.select_related('company', 'user').filter(pk__in=list(invite_ids))
+    for invite in invites:
+        email = invite.email if invite.email else invite.user.email
+        invite.company.send_invite_notification(invite=invite, email=email)
+
+
+def _deliver_invite_notifications(invite_ids):
+    if not getattr(settings, 'GARPIX_COMPANY_INVITE_NOTIFY_ASYNC', True):
+        send_invite_notifications(invite_ids)
+        return
+
+    from garpix_company.tasks import send_invite_notifications_task
+
+    batch_size = getattr(settings, 'GARPIX_COMPANY_INVITE_NOTIFY_BATCH_SIZE', 100)
+    for start in range(0, len(invite_ids), batch_size):
+        batch = invite_ids[start:start + batch_size]
+        try:
+            send_invite_notifications_task.delay(batch)
+        except Exception:  # noqa
+            logger.exception('Invite notifications task was not queued, sending in-process')
+            send_invite_notifications(batch)
+
+
+def queue_invite_notifications(invite_ids):
+    """
+    Поставить отправку уведомлений по инвайтам в очередь после фиксации транзакции
+    :param invite_ids: id инвайтов
+    """
+    invite_ids = list(invite_ids)
+    if invite_ids:
+        transaction.on_commit(lambda: _deliver_invite_notifications(invite_ids))
@@ -0,0 +1,213 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils.translation import gettext_lazy as _
+
+from garpix_company.models.invite import InviteToCompany, TOKEN_ATTEMPTS, TOKEN_LENGTH
+from garpix_company.models.user_company import get_user_company_model
+from garpix_company.services.company_limit_service import check_users_companies_limit
+from garpix_company.services.counter_service import update_company_counters
+from garpix_company.services.invite_notification_service import queue_invite_notifications
+from garpix_company.services.role_service import UserCompanyRoleService
+from garpix_utils.string import get_random_string
+
+
+class BulkInviteService:
+    """
+    Массовое приглашение пользователей в компанию.
+    Применяет правила InviteToCompanySerializer набором запросов на весь список:
+    поиск пользователей и участников, отмена прежних инвайтов одним UPDATE, bulk_create новых.
+    """
+
+    STATUS_INVITED = 'invited'
+    STATUS_ERROR = 'error'
+
+    def __init__(self, company):
+        self.company = company
+        self.role_service = UserCompanyRoleService()
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'GARPIX_COMPANY_BULK_INVITE_BATCH_SIZE', 500)
+
+    def invite(self, rows, seen=None):
+        """
+        Пригласить пользователей
+        :param rows: список словарей с ключами email, user (id) и role (id)
+        :param seen: ключи пользователей и email предыдущих вызовов (для поиска дубликатов между порциями),
+            дополняется ключами приглашенных строк
+        :return: список результатов по строкам в исходном порядке
+        """
+        results = [self._init_result(index, row) for index, row in enumerate(rows)]
+
+        self._validate_rows(results)
+        self._resolve_users(results)
+        self._validate_members(results)
+        self._validate_duplicates(results, set() if seen is None else seen)
+
+        valid = [result for result in results if not result['errors']]
+        if valid:
+            invites = self._save(valid)
+            queue_invite_notifications([invite.pk for invite in invites])
+
+        return [self._format_result(result) for result in results]
+
+    def _init_result(self, index, row):
+        email = row.get('email') or None
+        return {
+            'index': index,
+            'email': email.strip() if isinstance(email, str) else email,
+            'user_id': row.get('user') or None,
+            'role_id': row.get('role'),
+            'role': None,
+            'user': None,
+            'invite': None,
+            'errors': [],
+        }
+
+    def _validate_rows(self, results):
+        CompanyRole = self.role_service.CompanyRoleModel
+        for result in results:
+            if not result['email'] and not result['user_id']:
+                result['errors'].append(_('Укажите email или id пользователя'))
+            if result['email']:
+                try:
+                    validate_email(result['email'])
+                except DjangoValidationError:
+                    result['errors'].append(_('Введите правильный адрес электронной почты.'))
+            role = self.role_service.get_role(result['role_id'])
+            if role is None:
+                result['errors'].append(_('Роль не найдена'))
+            elif role.role_type == CompanyRole.ROLE_TYPE.OWNER:
+                result['errors'].append(_('Нельзя пригласить пользователя на роль владельца'))
+            result['role'] = role
+
+    def _resolve_users(self, results):
+        pending = [result for result in results if not result['errors']]
+        users_by_id, users_by_email = self._lookup_users(pending)
+
+        invite_not_users = getattr(settings, 'GARPIX_COMPANY_INVITE_NOT_USERS', False)
+        for result in pending:
+            self._resolve_user(result, users_by_id, users_by_email, invite_not_users)
+
+        self._validate_limits(results)
+
+    def _lookup_emails(self, results):
+        # email ищется только для строк без id пользователя
+        return {result['email'] for result in results if result['email'] and not result['user_id']}
+
+    def _lookup_users(self, results):
+        """
+        Пользователи строк по id и email (по одному запросу)
+        :return: (словарь {id: пользователь}, словарь {email: пользователь})
+        """
+        User = get_user_model()
+
+        user_ids = {result['user_id'] for result in results if result['user_id']}
+        emails = self._lookup_emails(results)
+
+        users_by_id = {user.pk: user for user in User.objects.filter(pk__in=user_ids)} if user_ids else {}
+        users_by_email = {user.email: user for user in User.objects.filter(email__in=emails)} if emails else {}
+        return users_by_id, users_by_email
+
+    def _resolve_user(self, result, users_by_id, users_by_email, invite_not_users):
+        if result['user_id']:
+            user = users_by_id.get(result['user_id'])
+            if user is None:
+                result['errors'].append(_('Пользователь с указанным id не найден'))
+                return
+            result['email'] = user.email
+        else:
+            user = users_by_email.get(result['email'])
+            if user is None and not invite_not_users:
+                result['errors'].append(_('Пользователь с указанным email не зарегистрирован'))
+                return
+        result['user'] = user
+
+    def _validate_limits(self, results):
+        users = {result['user'].pk: result['user'] for result in results if result['user'] is not None}
+        limits = check_users_companies_limit(users.values()) if users else {}
+        for result in results:
+            if result['user'] is not None and not limits[result['user'].pk]:
+                result['errors'].append(_('У пользователя превышен лимит количества компаний'))
+
+    def _validate_members(self, results):
+        UserCompany = get_user_company_model()
+
+        user_ids = {result['user'].pk for result in results if result['user'] is not None and not result['errors']}
+        if not user_ids:
+            return
+        members = set(UserCompany.active_objects.filter(
+            company=self.company, user__in=user_ids).values_list('user', flat=True))
+        for result in results:
+            if not result['errors'] and result['user'] is not None and result['user'].pk in members:
+                result['errors'].append(_('Указанный пользователь уже является сотрудником компании'))
+
+    def _validate_duplicates(self, results, seen):
+        for result in results:
+            if result['errors']:
+                continue
+            keys = {('email', result['email'].lower())} if result['email'] else set()
+            if result['user'] is not None:
+                keys.add(('user', result['user'].pk))
+            if keys & seen:
+                result['errors'].append(_('Пользователь уже указан в списке'))
+            seen |= keys
+
+    def _save(self, results):
+        # При конкурентном создании инвайтов срабатывает уникальное ограничение ожидающих инвайтов -
+        # повторяем отмену прежних инвайтов и создание
+        for attempt in range(TOKEN_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    declined = self._supersede(results)
+                    invites = self._create(results)
+                    update_company_counters(self.company.pk, pending=len(invites) - declined)
+                    return invites
+            except IntegrityError:
+                if attempt == TOKEN_ATTEMPTS - 1:
+                    raise
+
+    def _supersede(self, results):
+        emails = {result['email'].lower() for result in results if result['email']}
+        user_ids = {result['user'].pk for result in results if result['user'] is not None}
+        return InviteToCompany.created_objects.alias(email_lower=Lower('email')).filter(
+            Q(email_lower__in=emails) | Q(user__in=user_ids), company=self.company
+        ).update(status=InviteToCompany.CHOICES_INVITE_STATUS.DECLINED)
+
+    def _generate_tokens(self, count):
+        tokens = set()
+        while len(tokens) < count:
+            tokens.update(get_random_string(TOKEN_LENGTH) for _i in range(count - len(tokens)))
+            tokens -= set(InviteToCompany.objects.filter(token__in=tokens).values_list('token', flat=True))
+        return list(tokens)
+
+    def _create(self, results):
+        tokens = self._generate_tokens(len(results))
+        invites = [
+            InviteToCompany(company=self.company, email=result['email'], user=result['user'],
+                            role=result['role'], token=token)
+            for result, token in zip(results, tokens)
+        ]
+        invites = InviteToCompany.objects.bulk_create(invites, batch_size=self.batch_size)
+        if any(invite.pk is None for invite in invites):
+            pks = dict(InviteToCompany.objects.filter(token__in=tokens).values_list('token', 'pk'))
+            for invite in invites:
+                invite.pk = pks[invite.token]
+        for result, invite in zip(results, invites):
+            result['invite'] = invite
+        return invites
+
+    def _format_result(self, result):
+        return {
+            'index': result['index'],
+            'email': result['email'],
+            'user': result['user'].pk if result['user'] is not None else result['user_id'],
+            'status': self.STATUS_ERROR if result['errors'] else self.STATUS_INVITED,
+            'invite': result['invite'].pk if result['invite'] is not None else None,
+            'errors': [str(error) for error in result['errors']],
+        }
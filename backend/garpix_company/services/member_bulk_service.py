@@ -0,0 +1,139 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+
+from garpix_company.models.user_company import get_user_company_model
+from garpix_company.services.counter_service import apply_members_removed, counters_suspended, \
+    update_company_counters
+from garpix_company.services.role_service import UserCompanyRoleService
+
+
+class BulkMemberService:
+    """
+    Массовые операции над участниками компании.
+    Применяет правила AbstractUserCompany.block/unblock/kick/change_role к списку участников:
+    один запрос на чтение, один UPDATE/DELETE на операцию.
+    """
+
+    STATUS_SUCCESS = 'success'
+    STATUS_ERROR = 'error'
+
+    def __init__(self, company):
+        self.company = company
+        self.role_service = UserCompanyRoleService()
+        self.UserCompany = get_user_company_model()
+
+    def block(self, ids):
+        """
+        Заблокировать участников
+        :param ids: список id участников компании
+        :return: список результатов по id в исходном порядке
+        """
+        return self._run(ids, self._validate_block, lambda queryset: self._set_blocked(queryset, True))
+
+    def unblock(self, ids):
+        """
+        Разблокировать участников
+        """
+        return self._run(ids, None, lambda queryset: self._set_blocked(queryset, False))
+
+    def kick(self, ids):
+        """
+        Удалить участников из компании
+        """
+        return self._run(ids, self._validate_kick, self._delete)
+
+    def change_role(self, ids, role_id):
+        """
+        Сменить роль участников
+        :param role_id: id новой роли
+        """
+        role = self.role_service.get_role(role_id)
+        owner_role = self.role_service.get_owner_role()
+        admin_role = self.role_service.get_admin_role()
+
+        def validate(member):
+            if self._is_owner(member):
+                return _('Нельзя сменить роль владельца компании')
+            if role is None:
+                return _('Роль не найдена')
+            if owner_role is not None and role.pk == owner_role.pk:
+                return _('Нельзя сделать пользователя владельцем. Воспользуйтесь функционалом смены владельца')
+            if admin_role is not None and role.pk == admin_role.pk and member['is_blocked']:
+                return _('Нельзя сделать администратором заблокированного пользователя')
+            return None
+
+        return self._run(ids, validate, lambda queryset: self._set_role(queryset, role))
+
+    def _set_role(self, queryset, role):
+        queryset.update(role=role)
+        update_company_counters(self.company.pk)
+
+    def _set_blocked(self, queryset, is_blocked):
+        changed = queryset.filter(is_blocked=not is_blocked).update(is_blocked=is_blocked)
+        delta = changed if is_blocked else -changed
+        update_company_counters(self.company.pk, active=-delta, blocked=delta)
+
+    def _delete(self, queryset):
+        members = list(queryset.select_for_update().values_list('user_id', 'is_blocked'))
+        with counters_suspended():
+            queryset.delete()
+        apply_members_removed(self.company.pk, members)
+
+    def _is_owner(self, member):
+        return member['user_id'] == member['owner_id']
+
+    def _validate_block(self, member):
+        if self._is_owner(member):
+            return _('Нельзя заблокировать владельца компании')
+        return None
+
+    def _validate_kick(self, member):
+        if self._is_owner(member):
+            return _('Нельзя удалить владельца компании')
+        return None
+
+    def _run(self, ids, validate, apply):
+        ids = list(dict.fromkeys(ids))
+        # проверка и изменение в одной транзакции по заблокированным строкам:
+        # смена владельца или блокировка между ними не обходит правила
+        with transaction.atomic():
+            errors = self._validate(ids, self._lock_members(ids), validate)
+            valid_ids = [pk for pk in ids if pk not in errors]
+            if valid_ids:
+                apply(self.UserCompany.objects.filter(company=self.company, pk__in=valid_ids))
+        return self._format_results(ids, errors)
+
+    def _lock_members(self, ids):
+        """
+        Участники компании из списка с блокировкой строк до конца транзакции
+        :return: словарь {id: {pk, user_id, role_id, is_blocked, owner_id}}
+        """
+        queryset = self.UserCompany.objects.filter(company=self.company, pk__in=ids).select_for_update()
+        return {
+            member['pk']: member
+            for member in queryset.values('pk', 'user_id', 'role_id', 'is_blocked', owner_id=F('company__owner_id'))
+        }
+
+    def _validate(self, ids, members, validate):
+        """
+        :return: словарь ошибок {id участника: сообщение}
+        """
+        errors = {}
+        for pk in ids:
+            member = members.get(pk)
+            if member is None:
+                errors[pk] = _('Участник компании не найден')
+            elif validate is not None and (error := validate(member)):
+                errors[pk] = error
+        return errors
+
+    def _format_results(self, ids, errors):
+        return [
+            {
+                'id': pk,
+                'status': self.STATUS_ERROR if pk in errors else self.STATUS_SUCCESS,
+                'errors': [str(errors[pk])] if pk in errors else [],
+            }
+            for pk in ids
+        ]
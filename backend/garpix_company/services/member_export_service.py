@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+
+from django.conf import settings
+
+EXPORT_COLUMNS = ('user', 'email', 'role', 'role_type', 'is_blocked', 'created_at')
+EXPORT_VALUES = ('user_id', 'user__email', 'role__title', 'role__role_type', 'is_blocked', 'created_at')
+
+
+def _format_value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+class MemberExportService:
+    """
+    Выгрузка участников компании построчно (CSV или NDJSON).
+    Читаются только нужные колонки через серверный курсор, память не зависит от размера компании
+    """
+
+    FORMAT_CSV = 'csv'
+    FORMAT_NDJSON = 'ndjson'
+    FORMATS = {
+        FORMAT_CSV: 'text/csv',
+        FORMAT_NDJSON: 'application/x-ndjson',
+    }
+
+    def __init__(self, queryset, chunk_size=None):
+        self.queryset = queryset
+        self.chunk_size = chunk_size or getattr(settings, 'GARPIX_COMPANY_MEMBER_EXPORT_CHUNK_SIZE', 2000)
+
+    def iter_rows(self):
+        return self.queryset.values_list(*EXPORT_VALUES).iterator(chunk_size=self.chunk_size)
+
+    def iter_csv(self):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush():
+            value = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            return value
+
+        writer.writerow(EXPORT_COLUMNS)
+        yield flush()
+        for row in self.iter_rows():
+            writer.writerow([_format_value(value) for value in row])
+            yield flush()
+
+    def iter_ndjson(self):
+        for row in self.iter_rows():
+            yield json.dumps(dict(zip(EXPORT_COLUMNS, map(_format_value, row))), ensure_ascii=False) + '\n'
+
+    def iter_export(self, export_format):
+        if export_format == self.FORMAT_NDJSON:
+            return self.iter_ndjson()
+        return self.iter_csv()
@@ -0,0 +1,109 @@
+from django.db.models import F
+
+from garpix_company.helpers import COMPANY_STATUS_ENUM
+from garpix_company.models.user_company import get_user_company_model
+from garpix_company.models.user_role import get_company_role_model
+
+
+class CompanyMembership:
+    """
+    Членство пользователя в компании.
+    Загружается одним запросом и переиспользуется проверками прав в рамках запроса.
+    """
+
+    def __init__(self, user, company, user_company=None):
+        self.user = user
+        self.company = company
+        self.company_id = getattr(company, 'pk', company)
+        self.user_company = user_company
+        role = user_company.role if user_company else None
+        self.role_type = role.role_type if role else None
+        self.is_blocked = user_company.is_blocked if user_company else False
+
+    @classmethod
+    def load(cls, user, company):
+        UserCompany = get_user_company_model()
+        company_id = getattr(company, 'pk', company)
+        user_company = None
+        if user is not None and user.is_authenticated and company_id is not None:
+            try:
+                user_company = UserCompany.objects.select_related('role').annotate(
+                    company_owner_id=F('company__owner_id')).get(company_id=company_id, user=user)
+            except UserCompany.DoesNotExist:
+                pass
+        return cls(user, company, user_company)
+
+    @property
+    def is_member(self):
+        return self.user_company is not None and not self.is_blocked
+
+    @property
+    def is_admin(self):
+        return self.is_member and self.role_type == get_company_role_model().ROLE_TYPE.ADMIN
+
+    @property
+    def is_owner(self):
+        # источник владения - поле owner компании, как в AbstractCompany.is_owner
+        if self.user_company is None:
+            return False
+        owner_id = getattr(self.user_company, 'company_owner_id', None)
+        if owner_id is None and hasattr(self.company, 'owner_id'):
+            owner_id = self.company.owner_id
+        return owner_id is not None and owner_id == self.user_company.user_id
+
+
+def get_company_membership(request, company):
+    """
+    Членство текущего пользователя в компании, закэшированное на объекте запроса
+    :param request: запрос
+    :param company: компания или ее id
+    :return: CompanyMembership
+    """
+    company_id = getattr(company, 'pk', company)
+    memberships = getattr(request, '_garpix_company_memberships', None)
+    if memberships is None:
+        memberships = {}
+        request._garpix_company_memberships = memberships
+    if company_id not in memberships:
+        memberships[company_id] = CompanyMembership.load(request.user, company)
+    return memberships[company_id]
+
+
+def reset_company_membership(request, company=None):
+    """
+    Сбросить закэшированное членство (например, после смены ролей)
+    """
+    memberships = getattr(request, '_garpix_company_memberships', None)
+    if not memberships:
+        return
+    if company is None:
+        memberships.clear()
+    else:
+        memberships.pop(getattr(company, 'pk', company), None)
+
+
+def get_user_memberships(user, status=COMPANY_STATUS_ENUM.ACTIVE, role_type=None):
+    """
+    Членства пользователя вместе с компаниями и ролями (один запрос)
+    :param user: пользователь
+    :param status: статус компаний
+    :param role_type: тип роли пользователя в компании
+    :return: QuerySet
+    """
+    UserCompany = get_user_company_model()
+    queryset = UserCompany.objects.filter(user=user, company__status=status).select_related('company', 'role')
+    if role_type:
+        queryset = queryset.filter(role__role_type=role_type)
+    return queryset
+
+
+def annotate_company_membership(user_company):
+    """
+    Компания членства с полями роли пользователя (как у CompanyQuerySet.with_user_role)
+    """
+    company = user_company.company
+    company.user_role_id = user_company.role_id
+    company.user_role_type = user_company.role.role_type if user_company.role else None
+    company.user_is_blocked = user_company.is_blocked
+    company.user_is_owner = company.owner_id == user_company.user_id
+    return company
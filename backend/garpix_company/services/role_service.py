@@ -1,16 +1,135 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
 from garpix_company.models.user_role import get_company_role_model
 
 
+class CompanyRoleRegistry:
+    """
+    Кэш ролей компании на уровне процесса.
+    Таблица ролей загружается один раз, сбрасывается сигналами модели ролей после фиксации транзакции
+    и версией в кэше Django (для остальных процессов).
+    Пока в текущей транзакции есть незафиксированные изменения ролей, роли читаются из базы без кэширования.
+    """
+
+    cache_key = 'garpix_company:roles_version'
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._roles = None
+        self._roles_by_type = None
+        self._version = None
+        self._checked_at = 0.0
+        self._pending = threading.local()
+
+    @property
+    def sync_interval(self):
+        return getattr(settings, 'GARPIX_COMPANY_ROLES_SYNC_INTERVAL', 5)
+
+    def _get_shared_version(self):
+        return cache.get(self.cache_key)
+
+    def _load(self):
+        CompanyRoleModel = get_company_role_model()
+        roles = {}
+        roles_by_type = {}
+        # порядок модели ('-id') сохраняет поведение прежнего filter(...).first()
+        for role in CompanyRoleModel.objects.all():
+            roles[role.pk] = role
+            roles_by_type.setdefault(role.role_type, role)
+        return roles, roles_by_type
+
+    def mark_pending(self):
+        """
+        Пометить, что в транзакции текущего потока есть незафиксированные изменения ролей
+        """
+        self._pending.value = True
+
+    def has_pending_changes(self):
+        """
+        Есть ли в текущей транзакции незафиксированные изменения ролей.
+        Отметка снимается в invalidate после фиксации, а после отката - при выходе из транзакции
+        """
+        if not getattr(self._pending, 'value', False):
+            return False
+        if not connection.in_atomic_block:
+            self._pending.value = False
+            return False
+        return True
+
+    def _ensure_loaded(self):
+        if self.has_pending_changes():
+            return self._load()
+        now = time.monotonic()
+        with self._lock:
+            if self._roles is not None and now - self._checked_at < self.sync_interval:
+                return self._roles, self._roles_by_type
+            version = self._get_shared_version()
+            if self._roles is None or version != self._version:
+                self._roles, self._roles_by_type = self._load()
+                self._version = version
+            self._checked_at = now
+            return self._roles, self._roles_by_type
+
+    def get_roles(self):
+        roles, _roles_by_type = self._ensure_loaded()
+        return list(roles.values())
+
+    def get_role(self, pk):
+        roles, _roles_by_type = self._ensure_loaded()
+        try:
+            return roles.get(int(pk))
+        except (TypeError, ValueError):
+            return None
+
+    def get_role_by_type(self, role_type):
+        _roles, roles_by_type = self._ensure_loaded()
+        return roles_by_type.get(role_type)
+
+    def clear(self):
+        """
+        Сбросить кэш текущего процесса
+        """
+        with self._lock:
+            self._roles = None
+            self._roles_by_type = None
+
+    def invalidate(self):
+        """
+        Сбросить кэш текущего процесса и пометить устаревшим кэш остальных процессов
+        """
+        self._pending.value = False
+        self.clear()
+        cache.set(self.cache_key, uuid.uuid4().hex, None)
+
+
+role_registry = CompanyRoleRegistry()
+
+
+def invalidate_roles_cache(sender, **kwargs):
+    # сброс только после фиксации: до нее другие соединения не видят изменений, а при откате сбрасывать нечего
+    role_registry.mark_pending()
+    transaction.on_commit(role_registry.invalidate)
+
+
 class UserCompanyRoleService:
 
     def __init__(self):
         self.CompanyRoleModel = get_company_role_model()
 
+    def get_role(self, pk):
+        return role_registry.get_role(pk)
+
     def get_owner_role(self):
-        return self.CompanyRoleModel.objects.filter(role_type=self.CompanyRoleModel.ROLE_TYPE.OWNER).first()
+        return role_registry.get_role_by_type(self.CompanyRoleModel.ROLE_TYPE.OWNER)
 
     def get_employee_role(self):
-        return self.CompanyRoleModel.objects.filter(role_type=self.CompanyRoleModel.ROLE_TYPE.EMPLOYEE).first()
+        return role_registry.get_role_by_type(self.CompanyRoleModel.ROLE_TYPE.EMPLOYEE)
 
     def get_admin_role(self):
-        return self.CompanyRoleModel.objects.filter(role_type=self.CompanyRoleModel.ROLE_TYPE.ADMIN).first()
+        return role_registry.get_role_by_type(self.CompanyRoleModel.ROLE_TYPE.ADMIN)
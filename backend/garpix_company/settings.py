@@ -10,3 +10,5 @@ GARPIX_COMPANY_NOTIFY_EVENTS = {
                                "</ul>",
     }
 }
+
+GARPIX_COMPANY_CELERY_SETTINGS = 'app.celery.app'
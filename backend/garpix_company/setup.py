@@ -9,7 +9,7 @@ with open(path.join(here, 'README.md'), encoding='utf-8') as f:
 
 setup(
     name='garpix_company',
-    version='2.9.0-rc11',
+    version='2.10.0-rc1',
     description='',
     long_description=long_description,
     long_description_content_type='text/markdown',
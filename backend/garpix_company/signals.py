@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+# Массовая смена статуса компаний (отправляется один раз на порцию после фиксации транзакции).
+# Аргументы: sender - модель компании, company_ids - id измененных компаний,
+# transition - имя перехода (comp_banned, comp_active, comp_deleted), source - допустимые исходные статусы,
+# target - новый статус
+company_status_bulk_changed = Signal()
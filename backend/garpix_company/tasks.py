@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from garpix_company.services.company_purge_service import CompanyPurgeService
+from garpix_company.services.invite_expiry_service import expire_overdue_invites
+from garpix_company.services.invite_notification_service import send_invite_notifications
+
+celery_app = import_string(getattr(settings, 'GARPIX_COMPANY_CELERY_SETTINGS', 'app.celery.app'))
+
+
+@celery_app.task
+def send_invite_notifications_task(invite_ids):
+    send_invite_notifications(invite_ids)
+
+
+@celery_app.task
+def expire_invites_task():
+    return expire_overdue_invites(max_batches=getattr(settings, 'GARPIX_COMPANY_INVITE_EXPIRE_MAX_BATCHES', None))
+
+
+@celery_app.task
+def purge_deleted_companies_task():
+    return CompanyPurgeService().purge(
+        max_companies=getattr(settings, 'GARPIX_COMPANY_PURGE_MAX_COMPANIES', None))
+
+
+# перевод просроченных инвайтов в expired по расписанию включается проектом явно
+if getattr(settings, 'GARPIX_COMPANY_INVITE_EXPIRE_SCHEDULE', None) is not None:
+    celery_app.conf.beat_schedule.update({
+        'garpix_company_expire_invites': {
+            'task': 'garpix_company.tasks.expire_invites_task',
+            'schedule': settings.GARPIX_COMPANY_INVITE_EXPIRE_SCHEDULE,
+        }
+    })
+
+# окончательное удаление компаний необратимо и включается проектом явно
+if getattr(settings, 'GARPIX_COMPANY_PURGE_SCHEDULE', None) is not None:
+    celery_app.conf.beat_schedule.update({
+        'garpix_company_purge_deleted_companies': {
+            'task': 'garpix_company.tasks.purge_deleted_companies_task',
+            'schedule': settings.GARPIX_COMPANY_PURGE_SCHEDULE,
+        }
+    })
@@ -1,3 +1,907 @@
-from django.test import TestCase  # noqa
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from garpix_company.helpers import COMPANY_STATUS_ENUM
+from garpix_company.models.company import get_company_model
+from garpix_company.serializers.company import CreateCompanySerializer
+from garpix_company.services.company_status_service import BulkCompanyStatusService, CompanyStatusTransitionError, \
+    get_transition_states
+from garpix_company.services.company_purge_service import CompanyPurgeService, get_purgeable_companies
+from garpix_company.services.counter_service import get_user_companies_count, update_company_counters
+from garpix_company.signals import company_status_bulk_changed
+from garpix_company.models.invite import InviteToCompany, TOKEN_LENGTH
+from garpix_company.models.user_company import get_user_company_model
+from garpix_company.models.user_role import get_company_role_model
+from garpix_company.services.invite_import_service import InviteImportService
+from garpix_company.services.invite_notification_service import queue_invite_notifications
+from garpix_company.services.membership_service import CompanyMembership
+from garpix_company.services.role_service import UserCompanyRoleService, role_registry
+
+User = get_user_model()
+Company = get_company_model()
+CompanyRole = get_company_role_model()
+UserCompany = get_user_company_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class GarpixCompanyTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.owner_role = CompanyRole.objects.create(title='owner', role_type=CompanyRole.ROLE_TYPE.OWNER)
+            cls.admin_role = CompanyRole.objects.create(title='admin', role_type=CompanyRole.ROLE_TYPE.ADMIN)
+            cls.employee_role = CompanyRole.objects.create(title='employee',
+                                                           role_type=CompanyRole.ROLE_TYPE.EMPLOYEE)
+        cls.owner = cls.create_user('owner')
+        cls.company = Company.objects.create(title='Company', full_title='Company', owner=cls.owner)
+        UserCompany.objects.create(company=cls.company, user=cls.owner, role=cls.owner_role)
+
+    def setUp(self):
+        role_registry.invalidate()
+
+    @classmethod
+    def create_user(cls, name, **kwargs):
+        return User.objects.create_user(username=name, email=f'{name}@example.com', password='password', **kwargs)
+
+    def get_client(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+
+class CompanyRoleRegistryTestCase(GarpixCompanyTestCase):
+
+    def test_rolled_back_role_is_not_cached(self):
+        self.assertEqual(UserCompanyRoleService().get_employee_role(), self.employee_role)
+        try:
+            with transaction.atomic():
+                role = CompanyRole.objects.create(title='employee 2', role_type=CompanyRole.ROLE_TYPE.EMPLOYEE)
+                self.assertEqual(role_registry.get_role(role.pk), role)
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.assertIsNone(role_registry.get_role(role.pk))
+        self.assertEqual(UserCompanyRoleService().get_employee_role(), self.employee_role)
+        self.assertCountEqual(role_registry.get_roles(), [self.owner_role, self.admin_role, self.employee_role])
+
+    def test_committed_role_invalidates_cache(self):
+        self.assertEqual(UserCompanyRoleService().get_employee_role(), self.employee_role)
+        with self.captureOnCommitCallbacks(execute=True):
+            role = CompanyRole.objects.create(title='employee 2', role_type=CompanyRole.ROLE_TYPE.EMPLOYEE)
+
+        self.assertFalse(role_registry.has_pending_changes())
+        self.assertEqual(role_registry.get_role(role.pk), role)
+        self.assertEqual(UserCompanyRoleService().get_employee_role(), role)
+
+
+class CompanyRoleRegistryTransactionTestCase(TransactionTestCase):
+
+    def setUp(self):
+        role_registry.invalidate()
+
+    def test_rollback_clears_pending_changes(self):
+        role = CompanyRole.objects.create(title='employee', role_type=CompanyRole.ROLE_TYPE.EMPLOYEE)
+        try:
+            with transaction.atomic():
+                CompanyRole.objects.filter(pk=role.pk).update(title='updated')
+                CompanyRole.objects.get(pk=role.pk).save()
+                self.assertTrue(role_registry.has_pending_changes())
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.assertFalse(role_registry.has_pending_changes())
+        self.assertEqual(role_registry.get_role(role.pk).title, 'employee')
+        with self.assertNumQueries(0):
+            role_registry.get_role(role.pk)
+
+
+class MembershipQueriesTestCase(GarpixCompanyTestCase):
+
+    def add_members(self, count):
+        start = User.objects.count()
+        users = User.objects.bulk_create(
+            User(username=f'bulk{index}', email=f'bulk{index}@example.com') for index in range(start, start + count))
+        UserCompany.objects.bulk_create(
+            UserCompany(company=self.company, user=user, role=self.employee_role) for user in users)
+
+    def test_membership_check_is_one_query(self):
+        member = self.create_user('member')
+        UserCompany.objects.create(company=self.company, user=member, role=self.employee_role)
+
+        for count in (10, 100):
+            self.add_members(count)
+            with self.subTest(members=count), self.assertNumQueries(1):
+                self.assertTrue(CompanyMembership.load(member, self.company).is_member)
+
+    def test_retrieve_queries_do_not_grow_with_members(self):
+        client = self.get_client(self.owner)
+        url = f'/api/company/{self.company.pk}/'
+        self.add_members(10)
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(client.get(url).status_code, 200)
+        self.add_members(100)
+
+        with self.assertNumQueries(len(small.captured_queries)):
+            self.assertEqual(client.get(url).status_code, 200)
+
+    @skipUnless(connection.vendor == 'sqlite', 'план запроса SQLite')
+    def test_membership_lookup_uses_unique_index(self):
+        queryset = UserCompany.objects.filter(company=self.company, user=self.owner)
+
+        plan = queryset.explain()
+
+        self.assertIn(f'SEARCH {UserCompany._meta.db_table} USING INDEX', plan)
+
+
+class MyCompaniesTestCase(GarpixCompanyTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('member')
+        self.client = self.get_client(self.user)
+        self.member = UserCompany.objects.create(company=self.company, user=self.user, role=self.employee_role)
+        Company.objects.filter(pk=self.company.pk).update(schet='40702810000000000001')
+
+    def get_mine(self, **params):
+        response = self.client.get('/api/company/mine/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_active_membership(self):
+        results = self.get_mine()
+
+        self.assertEqual([company['id'] for company in results], [self.company.pk])
+        self.assertEqual(results[0]['schet'], '40702810000000000001')
+        self.assertEqual(results[0]['user_role_id'], self.employee_role.pk)
+
+    def test_blocked_membership(self):
+        UserCompany.objects.filter(pk=self.member.pk).update(is_blocked=True)
+
+        results = self.get_mine()
+
+        self.assertEqual(self.client.get(f'/api/company/{self.company.pk}/').status_code, 403)
+        self.assertEqual(set(results[0]), {'id', 'title', 'status', 'user_role_id', 'user_role_type',
+                                           'user_is_blocked', 'user_is_owner'})
+        self.assertTrue(results[0]['user_is_blocked'])
+
+    def test_banned_company(self):
+        Company.objects.filter(pk=self.company.pk).update(status=COMPANY_STATUS_ENUM.BANNED)
+
+        results = self.get_mine(status=COMPANY_STATUS_ENUM.BANNED)
+
+        self.assertEqual(self.client.get(f'/api/company/{self.company.pk}/').status_code, 404)
+        self.assertEqual(results[0]['status'], COMPANY_STATUS_ENUM.BANNED)
+        self.assertNotIn('schet', results[0])
+
+
+class CompanyLookupTestCase(GarpixCompanyTestCase):
+    inn = '7700000001'
+
+    def setUp(self):
+        super().setUp()
+        Company.objects.filter(pk=self.company.pk).update(inn=self.inn, ogrn='1027700000001', kpp='770001001')
+        self.client = self.get_client(self.create_user('other'))
+
+    def create_company(self):
+        return self.client.post('/api/company/', {'title': 'Other', 'full_title': 'Other', 'inn': self.inn},
+                                format='json')
+
+    def test_lookup_returns_ids_only(self):
+        response = self.client.get('/api/company/lookup/', {'inn': self.inn})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'exists': True, 'ids': [self.company.pk]})
+
+    def test_lookup_not_found(self):
+        Company.objects.filter(pk=self.company.pk).update(status=COMPANY_STATUS_ENUM.DELETED)
+
+        response = self.client.get('/api/company/lookup/', {'inn': self.inn})
+
+        self.assertEqual(response.data, {'exists': False, 'ids': []})
+        self.assertEqual(self.client.get('/api/company/lookup/').status_code, 400)
+
+    @override_settings(GARPIX_COMPANY_UNIQUE_INN=True)
+    def test_create_duplicate_inn(self):
+        response = self.create_company()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('inn', response.data)
+        self.assertEqual(Company.objects.filter(inn=self.inn).count(), 1)
+
+    @override_settings(GARPIX_COMPANY_UNIQUE_INN=True)
+    def test_create_duplicate_inn_race(self):
+        Company.objects.filter(pk=self.company.pk).update(inn='7700000002')
+        create = CreateCompanySerializer._create
+
+        def concurrent_create(serializer, validated_data):
+            # компания с тем же ИНН создана конкурентным запросом после проверки дубликатов
+            Company.objects.create(title='Concurrent', full_title='Concurrent', inn=self.inn)
+            return create(serializer, validated_data)
+
+        with mock.patch.object(CreateCompanySerializer, '_create', concurrent_create):
+            response = self.create_company()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['inn'], ['Компания с указанным ИНН уже зарегистрирована'])
+        self.assertEqual(list(Company.objects.filter(inn=self.inn).values_list('title', flat=True)), ['Concurrent'])
+
+    def test_create_same_inn_allowed_by_default(self):
+        Company.objects.filter(pk=self.company.pk).update(status=COMPANY_STATUS_ENUM.DELETED)
+
+        self.assertEqual(self.create_company().status_code, 201)
+
+
+class InviteTokenTestCase(GarpixCompanyTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('invited')
+        self.invite = InviteToCompany.objects.create(company=self.company, email=self.user.email,
+                                                     role=self.employee_role)
+
+    def test_tokens_are_unique(self):
+        other = InviteToCompany.objects.create(company=self.company, email='other@example.com', role=self.employee_role)
+
+        self.assertEqual(len(self.invite.token), TOKEN_LENGTH)
+        self.assertNotEqual(self.invite.token, other.token)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            InviteToCompany.objects.filter(pk=other.pk).update(token=self.invite.token)
+
+    def test_generate_token_skips_existing(self):
+        token = 'a' * TOKEN_LENGTH
+        with mock.patch('garpix_company.models.invite.get_random_string', side_effect=[self.invite.token, token]):
+            self.assertEqual(InviteToCompany.generate_token(), token)
+
+    def test_save_retries_token_collision(self):
+        token = 'b' * TOKEN_LENGTH
+        with mock.patch.object(InviteToCompany, 'generate_token', side_effect=[self.invite.token, token]):
+            invite = InviteToCompany.objects.create(company=self.company, email='other@example.com',
+                                                    role=self.employee_role)
+
+        self.assertEqual(invite.token, token)
+
+    def test_token_retrieve(self):
+        response = self.get_client(self.user).get(f'/api/company_invite/token/{self.invite.token}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['email'], self.user.email)
+
+    def test_token_accept(self):
+        response = self.get_client(self.user).post(f'/api/company_invite/token/{self.invite.token}/accept/')
+
+        self.assertEqual(response.status_code, 200)
+        self.invite.refresh_from_db()
+        self.assertEqual(self.invite.status, InviteToCompany.CHOICES_INVITE_STATUS.ACCEPTED)
+        self.assertTrue(UserCompany.objects.filter(company=self.company, user=self.user,
+                                                   role=self.employee_role).exists())
+
+    def test_token_decline(self):
+        response = self.get_client(self.user).post(f'/api/company_invite/token/{self.invite.token}/decline/')
+
+        self.assertEqual(response.status_code, 200)
+        self.invite.refresh_from_db()
+        self.assertEqual(self.invite.status, InviteToCompany.CHOICES_INVITE_STATUS.DECLINED)
+
+    def test_token_accept_by_other_user(self):
+        response = self.get_client(self.create_user('other')).post(
+            f'/api/company_invite/token/{self.invite.token}/accept/')
+
+        self.assertEqual(response.status_code, 403)
+        self.invite.refresh_from_db()
+        self.assertEqual(self.invite.status, InviteToCompany.CHOICES_INVITE_STATUS.CREATED)
+
+    def test_token_queries(self):
+        client = self.get_client(self.user)
+        url = f'/api/company_invite/token/{self.invite.token}/'
+        for count in (0, 50):
+            InviteToCompany.objects.bulk_create(
+                InviteToCompany(company=self.company, email=f'other{count}_{index}@example.com',
+                                role=self.employee_role, token=InviteToCompany.generate_token())
+                for index in range(count))
+            with self.subTest(invites=count), self.assertNumQueries(2):
+                self.assertEqual(client.get(url).status_code, 200)
+
+        with self.assertNumQueries(12):
+            self.assertEqual(client.post(f'{url}accept/').status_code, 200)
+
+    def test_invalid_token(self):
+        client = self.get_client(self.user)
+
+        self.assertEqual(client.get('/api/company_invite/token/invalid/').status_code, 404)
+        self.assertEqual(client.post('/api/company_invite/token/invalid/accept/').status_code, 404)
+        self.assertEqual(client.post('/api/company_invite/token/invalid/decline/').status_code, 404)
+
+    @override_settings(GARPIX_COMPANY_INVITE_TTL=60)
+    def test_overdue_token_accept(self):
+        InviteToCompany.objects.filter(pk=self.invite.pk).update(created_at=timezone.now() - timedelta(minutes=2))
+
+        response = self.get_client(self.user).post(f'/api/company_invite/token/{self.invite.token}/accept/')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UserCompany.objects.filter(company=self.company, user=self.user).exists())
+
+    def test_expired_token(self):
+        self.invite.expire()
+        client = self.get_client(self.user)
+
+        self.assertEqual(client.get(f'/api/company_invite/token/{self.invite.token}/').status_code, 404)
+        self.assertEqual(client.post(f'/api/company_invite/token/{self.invite.token}/accept/').status_code, 404)
+        self.assertEqual(client.post(f'/api/company_invite/token/{self.invite.token}/decline/').status_code, 404)
+
+
+class InviteNotificationTestCase(GarpixCompanyTestCase):
+
+    def queue(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            queue_invite_notifications([1, 2])
+
+    @mock.patch('garpix_company.services.invite_notification_service.send_invite_notifications')
+    @mock.patch('garpix_company.tasks.send_invite_notifications_task.delay')
+    def test_sent_by_task(self, delay, send):
+        self.queue()
+
+        delay.assert_called_once_with([1, 2])
+        send.assert_not_called()
+
+    @mock.patch('garpix_company.services.invite_notification_service.send_invite_notifications')
+    @mock.patch('garpix_company.tasks.send_invite_notifications_task.delay', side_effect=ConnectionError)
+    def test_sent_in_process_if_not_queued(self, delay, send):
+        with self.assertLogs('garpix_company.services.invite_notification_service', 'ERROR'):
+            self.queue()
+
+        send.assert_called_once_with([1, 2])
+
+    @override_settings(GARPIX_COMPANY_INVITE_NOTIFY_ASYNC=False)
+    @mock.patch('garpix_company.services.invite_notification_service.send_invite_notifications')
+    @mock.patch('garpix_company.tasks.send_invite_notifications_task.delay')
+    def test_sent_in_process_if_not_async(self, delay, send):
+        self.queue()
+
+        delay.assert_not_called()
+        send.assert_called_once_with([1, 2])
+
+
+class InviteImportTestCase(GarpixCompanyTestCase):
+
+    def import_file(self, content, name='invites.csv'):
+        return self.get_client(self.owner).post(f'/api/company/{self.company.pk}/invite_import/',
+                                                {'file': SimpleUploadedFile(name, content)}, format='multipart')
+
+    def test_import_csv(self):
+        user = self.create_user('invited')
+
+        response = self.import_file(f'email,role\n{user.email},{self.employee_role.pk}\n'.encode())
+
+        self.assertEqual(response.status_code, 200)
+        report = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(report[0], 'row,email,user,status,invite,errors')
+        self.assertTrue(report[1].startswith(f'2,{user.email},{user.pk},invited,'))
+
+    def test_import_not_utf8_csv(self):
+        response = self.import_file(f'email,role\nпользователь@example.com,{self.employee_role.pk}\n'.encode('cp1251'))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('file', response.data)
+
+    def test_duplicates_across_chunks(self):
+        user = self.create_user('invited')
+        rows = [
+            {'email': user.email, 'user': None, 'role': self.employee_role.pk},
+            {'email': user.email.upper(), 'user': None, 'role': self.employee_role.pk},
+            {'email': None, 'user': user.pk, 'role': self.employee_role.pk},
+        ]
+
+        results = list(InviteImportService(self.company, chunk_size=1).process(rows))
+
+        self.assertEqual([result['status'] for result in results], ['invited', 'error', 'error'])
+        self.assertEqual([result['row'] for result in results], [2, 3, 4])
+        self.assertEqual(InviteToCompany.objects.filter(company=self.company).count(), 1)
+
+
+class ListQueriesTestCase(GarpixCompanyTestCase):
+    page_sizes = (1, 5, 20)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for index in range(25):
+            user = cls.create_user(f'member{index}')
+            UserCompany.objects.create(company=cls.company, user=user, role=cls.employee_role)
+            InviteToCompany.objects.create(company=cls.company, email=f'invite{index}@example.com',
+                                           role=cls.employee_role)
+
+    def assertPageQueries(self, url, queries, count, **params):
+        client = self.get_client(self.owner)
+        client.get(url, params)
+        for page_size in self.page_sizes:
+            with self.subTest(page_size=page_size), self.assertNumQueries(queries):
+                response = client.get(url, {'page_size': page_size, **params})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), min(page_size, count))
+
+    def test_members_list_queries(self):
+        self.assertPageQueries(f'/api/company/{self.company.pk}/user/', 3, 26)
+
+    def test_members_list_with_count_queries(self):
+        self.assertPageQueries(f'/api/company/{self.company.pk}/user/', 4, 26, with_count='true')
+
+    def test_invites_list_queries(self):
+        self.assertPageQueries(f'/api/company/{self.company.pk}/invites/', 3, 25)
+
+
+class CompanyListTestCase(GarpixCompanyTestCase):
+    url = '/api/company/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.staff = cls.create_user('staff', is_staff=True)
+        now = timezone.now()
+        cls.companies = [cls.company]
+        for index in range(1, 6):
+            company = Company.objects.create(title=f'Company {index}', full_title=f'Full {index}',
+                                             inn=f'770000000{index}', ogrn=f'102770000000{index}', kpp=f'77000{index}')
+            Company.objects.filter(pk=company.pk).update(created_at=now - timedelta(days=index))
+            cls.companies.append(company)
+        cls.banned = Company.objects.create(title='Banned', full_title='Banned', status=COMPANY_STATUS_ENUM.BANNED)
+
+    def get_ids(self, **params):
+        response = self.get_client(self.staff).get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [company['id'] for company in response.data['results']]
+
+    def test_staff_only(self):
+        self.assertEqual(self.get_client(self.owner).get(self.url).status_code, 403)
+
+    def test_filters(self):
+        active_ids = sorted((company.pk for company in self.companies), reverse=True)
+        self.assertEqual(self.get_ids(), active_ids)
+        self.assertEqual(self.get_ids(status=COMPANY_STATUS_ENUM.BANNED), [self.banned.pk])
+        self.assertEqual(self.get_ids(inn='7700000002'), [self.companies[2].pk])
+        self.assertEqual(self.get_ids(ogrn='1027700000003'), [self.companies[3].pk])
+        self.assertEqual(self.get_ids(kpp='770004'), [self.companies[4].pk])
+        self.assertEqual(self.get_ids(search='Company 5'), [self.companies[5].pk])
+        self.assertEqual(self.get_ids(search='7700000001'), [self.companies[1].pk])
+        self.assertEqual(self.get_ids(search='770000000'), [])
+        created_after = (timezone.now() - timedelta(days=3, hours=1)).isoformat()
+        created_before = (timezone.now() - timedelta(days=1, hours=1)).isoformat()
+        self.assertEqual(self.get_ids(created_at_after=created_after, created_at_before=created_before),
+                         [self.companies[3].pk, self.companies[2].pk])
+
+    def test_cursor_pages(self):
+        client = self.get_client(self.staff)
+        url, params, ids = self.url, {'page_size': 2}, []
+        while url:
+            with self.assertNumQueries(1):
+                response = client.get(url, params)
+            self.assertNotIn('count', response.data)
+            ids.extend(company['id'] for company in response.data['results'])
+            url, params = response.data['next'], {}
+
+        self.assertEqual(ids, sorted((company.pk for company in self.companies), reverse=True))
+
+
+class MemberSearchTestCase(GarpixCompanyTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for name, first_name, last_name in (('ivanov', 'Иван', 'Иванов'), ('petrov', 'Пётр', 'Петров'),
+                                            ('sidorov', 'Иван', 'Сидоров'), ('ivanova', 'Анна', 'Иванова')):
+            user = cls.create_user(name, first_name=first_name, last_name=last_name)
+            UserCompany.objects.create(company=cls.company, user=user, role=cls.employee_role)
+
+    def search(self, **params):
+        response = self.get_client(self.owner).get(f'/api/company/{self.company.pk}/user/', params)
+        self.assertEqual(response.status_code, 200)
+        return [member['user']['email'].split('@')[0] for member in response.data['results']]
+
+    def test_search(self):
+        self.assertCountEqual(self.search(search='IVANOV'), ['ivanov', 'ivanova'])
+        self.assertCountEqual(self.search(search='Иван'), ['ivanov', 'sidorov', 'ivanova'])
+        self.assertCountEqual(self.search(search='Иван Сидор'), ['sidorov'])
+        self.assertEqual(self.search(search='@example.com', is_blocked='false', page_size=2, ordering='user_email'),
+                         ['ivanov', 'ivanova'])
+        self.assertEqual(self.search(search='nobody'), [])
+
+    def test_search_matches_search_filter(self):
+        for term in ('ivan', 'ПЕТ', 'example', 'ова'):
+            condition = Q(user__email__icontains=term) | Q(user__first_name__icontains=term) | Q(
+                user__last_name__icontains=term)
+            with self.subTest(term=term):
+                self.assertCountEqual(self.search(search=term),
+                                      UserCompany.objects.filter(condition, company=self.company).values_list(
+                                          'user__username', flat=True))
+
+    def test_search_queries(self):
+        client = self.get_client(self.owner)
+        url = f'/api/company/{self.company.pk}/user/'
+        client.get(url)
+
+        with self.assertNumQueries(3):
+            self.assertEqual(client.get(url, {'search': 'Иван'}).status_code, 200)
+
+
+class InviteListTestCase(GarpixCompanyTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        cls.invites = [
+            InviteToCompany.objects.create(company=cls.company, email=f'invite{index}@example.com',
+                                           role=cls.employee_role)
+            for index in range(5)
+        ]
+        # одинаковое время создания у части инвайтов: порядок между ними задает id
+        for index, invite in enumerate(cls.invites):
+            InviteToCompany.objects.filter(pk=invite.pk).update(created_at=now - timedelta(minutes=index // 2))
+
+    def test_cursor_pages_order(self):
+        client = self.get_client(self.owner)
+        url = f'/api/company/{self.company.pk}/invites/'
+        params = {'status': InviteToCompany.CHOICES_INVITE_STATUS.CREATED, 'page_size': 2}
+        ids = []
+        while url:
+            response = client.get(url, params)
+            ids.extend(invite['id'] for invite in response.data['results'])
+            url, params = response.data['next'], {}
+
+        expected = InviteToCompany.objects.filter(company=self.company).order_by('-created_at', '-id')
+        self.assertEqual(ids, list(expected.values_list('pk', flat=True)))
+
+    @skipUnless(connection.vendor == 'sqlite', 'план запроса SQLite')
+    def test_page_query_uses_list_index(self):
+        queryset = InviteToCompany.objects.filter(
+            company=self.company, status=InviteToCompany.CHOICES_INVITE_STATUS.CREATED).order_by('-created_at', '-id')
+
+        plan = queryset[:2].explain()
+
+        self.assertIn('USING INDEX garpix_company_inv_list_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class BulkMemberTestCase(GarpixCompanyTestCase):
+
+    def test_bulk_block(self):
+        member = UserCompany.objects.create(company=self.company, user=self.create_user('member'),
+                                            role=self.employee_role)
+        owner_member = UserCompany.objects.get(company=self.company, user=self.owner)
+
+        response = self.get_client(self.owner).post(f'/api/company/{self.company.pk}/user/bulk_block/',
+                                                    {'ids': [member.pk, owner_member.pk, 0]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in response.data['results']], ['success', 'error', 'error'])
+        self.assertEqual(list(UserCompany.objects.filter(is_blocked=True).values_list('pk', flat=True)), [member.pk])
+        self.company.refresh_from_db()
+        self.assertEqual((self.company.active_members_count, self.company.blocked_members_count), (1, 1))
+
+
+class CompanyOwnershipTestCase(GarpixCompanyTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.owner_member = UserCompany.objects.get(company=self.company, user=self.owner)
+        self.member = UserCompany.objects.create(company=self.company, user=self.create_user('member'),
+                                                 role=self.employee_role)
+        # роли изменены в обход change_owner: владелец определяется только полем owner компании
+        UserCompany.objects.filter(pk=self.owner_member.pk).update(role=self.admin_role)
+        UserCompany.objects.filter(pk=self.member.pk).update(role=self.owner_role)
+        self.owner_member.refresh_from_db()
+        self.member.refresh_from_db()
+
+    def test_membership_is_owner(self):
+        self.assertTrue(self.company.get_membership(self.owner).is_owner)
+        self.assertFalse(self.company.get_membership(self.member.user).is_owner)
+        self.assertTrue(self.owner_member.is_owner)
+        self.assertFalse(self.member.is_owner)
+
+    def test_owner_cannot_be_blocked_or_kicked(self):
+        self.assertFalse(self.owner_member.block()[0])
+        self.assertFalse(self.owner_member.kick()[0])
+        self.assertTrue(self.member.block()[0])
+
+    def test_bulk_actions_check_owner_field(self):
+        client = self.get_client(self.owner)
+        url = f'/api/company/{self.company.pk}/user/'
+
+        kick = client.post(f'{url}bulk_kick/', {'ids': [self.owner_member.pk]}, format='json')
+        role = client.post(f'{url}bulk_change_role/', {'ids': [self.member.pk], 'role': self.employee_role.pk},
+                           format='json')
+
+        self.assertEqual(kick.data['results'][0]['status'], 'error')
+        self.assertEqual(role.data['results'][0]['status'], 'success')
+        self.assertTrue(UserCompany.objects.filter(pk=self.owner_member.pk).exists())
+
+    def test_owner_permission_follows_owner_field(self):
+        response = self.get_client(self.member.user).post(
+            f'/api/company/{self.company.pk}/user/{self.owner_member.pk}/block/')
+
+        self.assertEqual(response.status_code, 403)
+
+
+class BulkCompanyStatusTestCase(GarpixCompanyTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.banned = Company.objects.create(title='Banned', full_title='Banned', status=COMPANY_STATUS_ENUM.BANNED)
+        self.deleted = Company.objects.create(title='Deleted', full_title='Deleted',
+                                              status=COMPANY_STATUS_ENUM.DELETED)
+        self.staff = self.create_user('staff', is_staff=True, is_superuser=True)
+
+    def statuses(self):
+        return dict(Company.objects.values_list('pk', 'status'))
+
+    def test_transition_states(self):
+        self.assertEqual(get_transition_states('comp_banned'), ([COMPANY_STATUS_ENUM.ACTIVE], COMPANY_STATUS_ENUM.BANNED))
+        self.assertEqual(get_transition_states('comp_deleted'),
+                         ([COMPANY_STATUS_ENUM.ACTIVE, COMPANY_STATUS_ENUM.BANNED], COMPANY_STATUS_ENUM.DELETED))
+        with self.assertRaises(CompanyStatusTransitionError):
+            get_transition_states('delete')
+
+    def test_apply(self):
+        Company.objects.update(updated_at=timezone.now() - timedelta(days=1))
+
+        results = BulkCompanyStatusService('comp_banned').apply(
+            [self.company.pk, self.banned.pk, self.deleted.pk, 0, self.company.pk])
+
+        self.assertEqual([(result['id'], result['status']) for result in results], [
+            (self.company.pk, 'success'), (self.banned.pk, 'error'), (self.deleted.pk, 'error'), (0, 'error')])
+        self.assertEqual(self.statuses(), {self.company.pk: COMPANY_STATUS_ENUM.BANNED,
+                                           self.banned.pk: COMPANY_STATUS_ENUM.BANNED,
+                                           self.deleted.pk: COMPANY_STATUS_ENUM.DELETED})
+        updated = Company.objects.filter(updated_at__gte=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(list(updated.values_list('pk', flat=True)), [self.company.pk])
+
+    def test_signal_sent_once_per_batch_on_commit(self):
+        handler = mock.Mock()
+        company_status_bulk_changed.connect(handler)
+        self.addCleanup(company_status_bulk_changed.disconnect, handler)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            BulkCompanyStatusService('comp_deleted', batch_size=2).apply(
+                [self.company.pk, self.banned.pk, self.deleted.pk])
+            handler.assert_not_called()
+
+        self.assertEqual(len(callbacks), 1)
+        handler.assert_called_once()
+        self.assertEqual(handler.call_args.kwargs['company_ids'], [self.company.pk, self.banned.pk])
+        self.assertEqual(handler.call_args.kwargs['transition'], 'comp_deleted')
+        self.assertEqual(handler.call_args.kwargs['target'], COMPANY_STATUS_ENUM.DELETED)
+
+    def test_signal_sent_per_batch(self):
+        other = Company.objects.create(title='Other', full_title='Other')
+        handler = mock.Mock()
+        company_status_bulk_changed.connect(handler)
+        self.addCleanup(company_status_bulk_changed.disconnect, handler)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BulkCompanyStatusService('comp_banned', batch_size=1).apply([self.company.pk, other.pk])
+
+        self.assertEqual([call.kwargs['company_ids'] for call in handler.call_args_list],
+                         [[self.company.pk], [other.pk]])
+
+    def test_bulk_status_endpoint(self):
+        data = {'ids': [self.company.pk, self.banned.pk], 'transition': 'comp_active'}
+
+        self.assertEqual(self.get_client(self.owner).post('/api/company/bulk_status/', data,
+                                                          format='json').status_code, 403)
+        response = self.get_client(self.staff).post('/api/company/bulk_status/', data, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in response.data['results']], ['error', 'success'])
+        self.assertEqual(self.statuses()[self.banned.pk], COMPANY_STATUS_ENUM.ACTIVE)
+
+    def test_bulk_status_endpoint_unknown_transition(self):
+        response = self.get_client(self.staff).post('/api/company/bulk_status/',
+                                                    {'ids': [self.company.pk], 'transition': 'delete'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.statuses()[self.company.pk], COMPANY_STATUS_ENUM.ACTIVE)
+
+    def test_admin_action(self):
+        self.client.force_login(self.staff)
+
+        response = self.client.post(f'{reverse("admin:app_company_changelist")}?status__exact=active', {
+            'action': 'ban_companies', '_selected_action': [self.company.pk]}, follow=True)
+
+        self.assertEqual(self.statuses()[self.company.pk], COMPANY_STATUS_ENUM.BANNED)
+        self.assertEqual([str(message) for message in response.context['messages']],
+                         ['Изменен статус компаний: 1, пропущено: 0'])
+
+
+class CompanyPurgeTestCase(GarpixCompanyTestCase):
+
+    def setUp(self):
+        super().setUp()
+        old = timezone.now() - timedelta(days=31)
+        self.expired = self.create_company('Expired', COMPANY_STATUS_ENUM.DELETED, old)
+        self.recent = self.create_company('Recent', COMPANY_STATUS_ENUM.DELETED, timezone.now() - timedelta(days=29))
+        self.active = self.create_company('Active', COMPANY_STATUS_ENUM.ACTIVE, old)
+        self.users = [self.create_user(f'member{index}') for index in range(5)]
+        for index, user in enumerate(self.users):
+            UserCompany.objects.create(company=self.expired, user=user, role=self.employee_role, is_blocked=index == 0)
+        UserCompany.objects.create(company=self.recent, user=self.users[1], role=self.employee_role)
+        UserCompany.objects.create(company=self.active, user=self.users[1], role=self.employee_role)
+        for index in range(3):
+            InviteToCompany.objects.create(company=self.expired, email=f'invite{index}@example.com',
+                                           role=self.employee_role)
+        InviteToCompany.objects.get(email='invite0@example.com').decline()
+        # строки счетчиков пользователей создаются при первом чтении
+        self.assertEqual(get_user_companies_count(self.users[1]), 3)
+
+    @staticmethod
+    def create_company(title, company_status, updated_at):
+        company = Company.objects.create(title=title, full_title=title, status=company_status)
+        Company.objects.filter(pk=company.pk).update(updated_at=updated_at)
+        return company
+
+    def test_purgeable_companies(self):
+        self.assertEqual(list(get_purgeable_companies(30)), [self.expired])
+        self.assertEqual(list(get_purgeable_companies(28).order_by('pk')), [self.expired, self.recent])
+
+    def test_purge(self):
+        stats = CompanyPurgeService(chunk_size=2, sleep=0).purge(retention_days=30)
+
+        self.assertEqual({key: stats[key] for key in ('companies', 'members', 'invites', 'chunks')},
+                         {'companies': 1, 'members': 5, 'invites': 3, 'chunks': 5})
+        self.assertFalse(Company.objects.filter(pk=self.expired.pk).exists())
+        self.assertFalse(UserCompany.objects.filter(company_id=self.expired.pk).exists())
+        self.assertFalse(InviteToCompany.objects.filter(company_id=self.expired.pk).exists())
+        self.assertCountEqual(Company.objects.values_list('pk', flat=True),
+                              [self.company.pk, self.recent.pk, self.active.pk])
+        self.assertEqual(UserCompany.objects.filter(user=self.users[1]).count(), 2)
+        self.assertEqual(get_user_companies_count(self.users[1]), 2)
+        self.assertEqual(get_user_companies_count(self.users[0]), 0)
+
+    def test_max_companies(self):
+        stats = CompanyPurgeService(sleep=0).purge(retention_days=0, max_companies=1)
+
+        self.assertEqual(stats['companies'], 1)
+        self.assertFalse(Company.objects.filter(pk=self.expired.pk).exists())
+        self.assertTrue(Company.objects.filter(pk=self.recent.pk).exists())
+
+    def test_resume_after_interruption(self):
+        service = CompanyPurgeService(chunk_size=2, sleep=0)
+        with mock.patch.object(CompanyPurgeService, '_delete_invites', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                service.purge(retention_days=30)
+
+        # порции участников удалены в своих транзакциях, счетчики обновлены вместе с ними
+        self.expired.refresh_from_db()
+        self.assertFalse(UserCompany.objects.filter(company_id=self.expired.pk).exists())
+        self.assertEqual(InviteToCompany.objects.filter(company_id=self.expired.pk).count(), 3)
+        self.assertEqual((self.expired.active_members_count, self.expired.blocked_members_count,
+                          self.expired.pending_invites_count), (0, 0, 2))
+        self.assertEqual(get_user_companies_count(self.users[1]), 2)
+
+        stats = CompanyPurgeService(chunk_size=2, sleep=0).purge(retention_days=30)
+
+        self.assertEqual((stats['companies'], stats['members'], stats['invites']), (1, 0, 3))
+        self.assertFalse(Company.objects.filter(pk=self.expired.pk).exists())
+        self.assertEqual(get_user_companies_count(self.users[1]), 2)
+
+    def test_restored_company_is_not_purged(self):
+        service = CompanyPurgeService(sleep=0)
+        Company.objects.filter(pk=self.expired.pk).update(status=COMPANY_STATUS_ENUM.ACTIVE)
+
+        self.assertFalse(service.purge_company(self.expired.pk))
+        self.assertEqual(UserCompany.objects.filter(company_id=self.expired.pk).count(), 5)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('purge_deleted_companies', '--dry-run', stdout=out)
+        self.assertIn('Компаний для удаления: 1', out.getvalue())
+        self.assertTrue(Company.objects.filter(pk=self.expired.pk).exists())
+
+        call_command('purge_deleted_companies', '--chunk-size=2', '--sleep=0', stdout=out)
+
+        self.assertIn('Удалено компаний: 1, участников: 5, инвайтов: 3', out.getvalue())
+        self.assertFalse(Company.objects.filter(pk=self.expired.pk).exists())
+
+
+class CompanySaveTestCase(GarpixCompanyTestCase):
+
+    def test_save_keeps_counters(self):
+        company = Company.objects.get(pk=self.company.pk)
+        update_company_counters(self.company.pk, active=5)
+
+        company.title = 'New title'
+        company.save()
+
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.title, 'New title')
+        self.assertEqual(self.company.active_members_count, 6)
+
+    def test_save_deferred_instance(self):
+        company = Company.objects.only('title').get(pk=self.company.pk)
+        update_company_counters(self.company.pk, active=5)
+
+        company.title = 'New title'
+        with self.assertNumQueries(1):
+            company.save()
+
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.title, 'New title')
+        self.assertEqual(self.company.active_members_count, 6)
+
+
+class ConditionalGetTestCase(GarpixCompanyTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.get_client(self.owner)
+        self.url = f'/api/company/{self.company.pk}/'
+        self.invites_url = f'/api/company/{self.company.pk}/invites/'
+
+    def set_modified(self, value):
+        Company.objects.filter(pk=self.company.pk).update(updated_at=value, membership_updated_at=value)
+
+    def test_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_with_membership(self):
+        etag = self.client.get(self.url)['ETag']
+        UserCompany.objects.create(company=self.company, user=self.create_user('member'), role=self.employee_role)
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_changes_with_owner_email(self):
+        self.set_modified(timezone.now() - timedelta(hours=1))
+        response = self.client.get(self.url)
+        User.objects.filter(pk=self.owner.pk).update(email='new-owner@example.com')
+
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.data['owner_email'], 'new-owner@example.com')
+
+    def test_if_modified_since(self):
+        self.set_modified(timezone.now() - timedelta(hours=1))
+        last_modified = self.client.get(self.invites_url)['Last-Modified']
+
+        self.assertEqual(self.client.get(self.invites_url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_if_none_match_takes_precedence(self):
+        self.set_modified(timezone.now() - timedelta(hours=1))
+        last_modified = self.client.get(self.invites_url)['Last-Modified']
+
+        response = self.client.get(self.invites_url, HTTP_IF_NONE_MATCH='"outdated"',
+                                   HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_no_last_modified_within_second_of_change(self):
+        now = timezone.now()
+        self.set_modified(now)
+
+        response = self.client.get(self.invites_url, HTTP_IF_MODIFIED_SINCE=http_date(now.timestamp()))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
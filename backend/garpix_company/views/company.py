@@ -1,24 +1,43 @@
 from django.conf import settings
+from django_filters.rest_framework import DjangoFilterBackend
+from django.http import StreamingHttpResponse
 from django.utils.module_loading import import_string
 from drf_spectacular.utils import OpenApiParameter, extend_schema
-from rest_framework import status
+from rest_framework import filters, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
 
-from garpix_company.helpers import CHOICES_INVITE_STATUS_ENUM
+from garpix_company.filters import CompanyFilter
+from garpix_company.helpers import CHOICES_INVITE_STATUS_ENUM, COMPANY_STATUS_ENUM
 from garpix_company.mixins.views import GarpixCompanyViewSetMixin
 from garpix_company.models import InviteToCompany
 from garpix_company.models.company import get_company_model
 from garpix_company.models.user_role import get_company_role_model
+from garpix_company.services.role_service import role_registry
 from garpix_company.permissions import CompanyAdminOnly, CompanyOwnerOnly, CompanyUserOnly
+from garpix_company.pagination import MemberCursorPagination
+from garpix_company.services.authorization_service import authorized_companies
+from garpix_company.services.company_lookup_service import lookup_companies, lookup_companies_by_inns
+from garpix_company.services.company_status_service import BulkCompanyStatusService
+from garpix_company.services.conditional_service import company_conditional_response
+from garpix_company.services.invite_import_service import InviteImportError, InviteImportService, read_invite_rows
+from garpix_company.services.invite_service import BulkInviteService
+from garpix_company.services.membership_service import annotate_company_membership, get_user_memberships
 from garpix_company.serializers import CompanySerializer, CreateCompanySerializer, UpdateCompanySerializer, \
-    ChangeOwnerCompanySerializer, InviteToCompanySerializer, InvitesSerializer
+    ChangeOwnerCompanySerializer, InviteToCompanySerializer, InvitesSerializer, BulkInviteToCompanySerializer, \
+    InviteImportSerializer, CompanyLookupSerializer, CompanyLookupBatchSerializer, CompanyBulkStatusSerializer, \
+    CompanyMembershipShortSerializer
 from django.utils.translation import gettext_lazy as _
 
 Company = get_company_model()
 CompanyRole = get_company_role_model()
+CompaniesPagination = import_string(getattr(settings, 'GARPIX_COMPANY_COMPANIES_PAGINATION_CLASS',
+                                            'garpix_company.pagination.CompanyCursorPagination'))
+InvitesPagination = import_string(getattr(settings, 'GARPIX_COMPANY_INVITES_PAGINATION_CLASS',
+                                          'garpix_company.pagination.InviteCursorPagination'))
 CreateAndInviteToCompanySerializer = import_string(getattr(settings, 'GARPIX_COMPANY_CREATE_AND_INVITE_SERIALIZER',
                                                            'garpix_company.serializers.CreateAndInviteToCompanySerializer'))
 
@@ -28,6 +47,10 @@ class CompanyViewSet(GarpixCompanyViewSetMixin, ModelViewSet):
     queryset = Company.active_objects.all()
     serializer_class = CompanySerializer
     http_method_names = ['get', 'post', 'patch', 'head', 'options', 'delete']
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_class = CompanyFilter
+    search_fields = ['title', 'full_title', '=inn', '=ogrn']
+    pagination_class = CompaniesPagination
     permission_classes_by_action = {'create': [IsAuthenticated],
                                     'retrieve': [CompanyUserOnly],
                                     'list': [IsAdminUser],
@@ -37,23 +60,52 @@ class CompanyViewSet(GarpixCompanyViewSetMixin, ModelViewSet):
                                     'change_owner': [CompanyOwnerOnly],
                                     'invite': [CompanyAdminOnly | CompanyOwnerOnly],
                                     'create_and_invite': [CompanyAdminOnly | CompanyOwnerOnly],
-                                    'invites': [CompanyAdminOnly | CompanyOwnerOnly]
+                                    'bulk_invite': [CompanyAdminOnly | CompanyOwnerOnly],
+                                    'invite_import': [CompanyAdminOnly | CompanyOwnerOnly],
+                                    'invites': [CompanyAdminOnly | CompanyOwnerOnly],
+                                    'authorized': [IsAuthenticated],
+                                    'mine': [IsAuthenticated],
+                                    'lookup': [IsAuthenticated],
+                                    'lookup_batch': [IsAdminUser],
+                                    'bulk_status': [IsAdminUser]
                                     }
+    serializer_classes_by_action = {'create': CreateCompanySerializer,
+                                    'update': UpdateCompanySerializer,
+                                    'partial_update': UpdateCompanySerializer,
+                                    'change_owner': ChangeOwnerCompanySerializer,
+                                    'create_and_invite': CreateAndInviteToCompanySerializer,
+                                    'invites': InvitesSerializer,
+                                    'invite': InviteToCompanySerializer,
+                                    'bulk_invite': BulkInviteToCompanySerializer,
+                                    'invite_import': InviteImportSerializer,
+                                    'lookup': CompanyLookupSerializer,
+                                    'lookup_batch': CompanyLookupBatchSerializer,
+                                    'bulk_status': CompanyBulkStatusSerializer
+                                    }
+
+    def get_queryset(self):
+        if self.action == 'list':
+            # статус фильтруется CompanyFilter (по умолчанию активные)
+            queryset = Company.objects.all()
+        else:
+            queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.with_owner().with_user_role(self.request.user)
+        return queryset
+
+    def filter_queryset(self, queryset):
+        if self.action != 'list':
+            return queryset
+        return super().filter_queryset(queryset)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        # email владельца берется из профиля пользователя и не меняет версию компании
+        return company_conditional_response(request, instance, lambda: Response(self.get_serializer(instance).data),
+                                            extra=(getattr(instance, 'owner_email', None),))
 
     def get_serializer_class(self):
-        if self.action == 'create':
-            return CreateCompanySerializer
-        if self.action in ['update', 'partial_update']:
-            return UpdateCompanySerializer
-        if self.action == 'change_owner':
-            return ChangeOwnerCompanySerializer
-        if self.action == 'create_and_invite':
-            return CreateAndInviteToCompanySerializer
-        if self.action == 'invites':
-            return InvitesSerializer
-        if self.action == 'invite':
-            return InviteToCompanySerializer
-        return CompanySerializer
+        return self.serializer_classes_by_action.get(self.action, CompanySerializer)
 
     @action(detail=True, methods=['POST'])
     def change_owner(self, request, pk):
@@ -88,6 +140,30 @@ class CompanyViewSet(GarpixCompanyViewSetMixin, ModelViewSet):
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    @action(methods=['post'], detail=True)
+    def bulk_invite(self, request, pk):
+        company = self.get_object()
+        self.check_object_permissions(request, company)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = BulkInviteService(company).invite(serializer.validated_data['invites'])
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    @action(methods=['post'], detail=True, parser_classes=[MultiPartParser])
+    def invite_import(self, request, pk):
+        company = self.get_object()
+        self.check_object_permissions(request, company)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        file = serializer.validated_data['file']
+        try:
+            rows = read_invite_rows(file, file.name)
+        except InviteImportError as e:
+            return Response({'file': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(InviteImportService(company).iter_csv(rows), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="invite_import_{company.pk}.csv"'
+        return response
+
     @extend_schema(parameters=[
         OpenApiParameter(
             name='status',
@@ -98,23 +174,138 @@ class CompanyViewSet(GarpixCompanyViewSetMixin, ModelViewSet):
             name='role',
             type=int
         ),
+        OpenApiParameter(
+            name='cursor',
+            type=str
+        ),
+        OpenApiParameter(
+            name='page_size',
+            type=int
+        ),
     ])
     @action(methods=['get'], detail=True)
     def invites(self, request, pk):
         company = self.get_object()
         self.check_object_permissions(request, company)
-        queryset = InviteToCompany.objects.filter(company=company)
+        return company_conditional_response(request, company, lambda: self._invites(request, company), weak=True)
+
+    def _invites(self, request, company):
+        queryset = InviteToCompany.objects.filter(company=company).select_related('role')
         if invite_status := request.GET.get('status', None):
             queryset = queryset.filter(status=invite_status)
         if role_id := request.GET.get('role', None):
-            try:
-                role = CompanyRole.objects.get(id=role_id)
-                queryset = queryset.filter(role=role)
-            except CompanyRole.DoesNotExist:
+            role = role_registry.get_role(role_id)
+            if role is None:
                 return Response({'role': [_(f'Роли с id {role_id} не существует')]}, status=status.HTTP_400_BAD_REQUEST)
-        page = self.paginate_queryset(queryset)
+            queryset = queryset.filter(role_id=role.pk)
+        paginator = InvitesPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return paginator.get_paginated_response(serializer.data)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
+
+    @extend_schema(parameters=[
+        OpenApiParameter(
+            name='action',
+            type=str,
+            many=True,
+            required=True
+        ),
+        OpenApiParameter(
+            name='ids',
+            type=str,
+            required=True,
+            description='Comma separated company ids'
+        ),
+    ])
+    @action(methods=['get'], detail=False)
+    def authorized(self, request):
+        actions = request.GET.getlist('action')
+        unknown_actions = [item for item in actions if item not in self.permission_classes_by_action]
+        if not actions or unknown_actions:
+            return Response({'action': [_('Укажите корректные действия')]}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            company_ids = [int(company_id) for company_id in request.GET.get('ids', '').split(',') if company_id]
+        except ValueError:
+            return Response({'ids': [_('Укажите корректные id компаний')]}, status=status.HTTP_400_BAD_REQUEST)
+        if not company_ids:
+            return Response({'ids': [_('Укажите id компаний')]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            action_name: list(authorized_companies(request.user, action_name, company_ids,
+                                                   view_class=self.__class__).values_list('pk', flat=True))
+            for action_name in actions
+        })
+
+    @extend_schema(parameters=[
+        OpenApiParameter(
+            name='status',
+            type=str,
+            enum=[choice[0] for choice in COMPANY_STATUS_ENUM.CHOICES]
+        ),
+        OpenApiParameter(
+            name='role_type',
+            type=str,
+            enum=[choice[0] for choice in CompanyRole.ROLE_TYPE.choices]
+        ),
+        OpenApiParameter(
+            name='cursor',
+            type=str
+        ),
+        OpenApiParameter(
+            name='page_size',
+            type=int
+        ),
+    ])
+    @action(methods=['get'], detail=False)
+    def mine(self, request):
+        company_status = request.GET.get('status', COMPANY_STATUS_ENUM.ACTIVE)
+        if company_status not in dict(COMPANY_STATUS_ENUM.CHOICES):
+            return Response({'status': [_('Укажите корректный статус компании')]}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = get_user_memberships(request.user, company_status, request.GET.get('role_type', None))
+        paginator = MemberCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+        data = []
+        for user_company in page:
+            company = annotate_company_membership(user_company)
+            # данные компании - только тем, кому их отдает retrieve (CompanyUserOnly, активные компании)
+            if user_company.is_blocked or company.status != COMPANY_STATUS_ENUM.ACTIVE:
+                data.append(CompanyMembershipShortSerializer(company, context=context).data)
+            else:
+                data.append(serializer_class(company, context=context).data)
+        return paginator.get_paginated_response(data)
+
+    @extend_schema(parameters=[
+        OpenApiParameter(
+            name='inn',
+            type=str
+        ),
+        OpenApiParameter(
+            name='ogrn',
+            type=str
+        ),
+    ])
+    @action(methods=['get'], detail=False)
+    def lookup(self, request):
+        inn = request.GET.get('inn', None)
+        ogrn = request.GET.get('ogrn', None)
+        if not inn and not ogrn:
+            return Response({'non_field_error': [_('Укажите ИНН или ОГРН')]}, status=status.HTTP_400_BAD_REQUEST)
+        ids = list(lookup_companies(inn, ogrn).order_by('pk').values_list('pk', flat=True))
+        return Response(self.get_serializer({'exists': bool(ids), 'ids': ids}).data)
+
+    @action(methods=['post'], detail=False)
+    def lookup_batch(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'results': lookup_companies_by_inns(serializer.validated_data['inns'])})
+
+    @action(methods=['post'], detail=False)
+    def bulk_status(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        service = BulkCompanyStatusService(serializer.validated_data['transition'])
+        return Response({'results': service.apply(serializer.validated_data['ids'])})
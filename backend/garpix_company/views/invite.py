@@ -19,13 +19,16 @@ class InviteToCompanyViewSet(GarpixCompanyViewSetMixin, mixins.RetrieveModelMixi
     serializer_class = InviteToCompanySerializer
     permission_classes = [permissions.IsAdminUser | CompanyAdminOnly | CompanyOwnerOnly | CompanyInviteReceiverOnly]
 
-    # lookup_field = 'token'  # TODO сделать вариант инвайта по токену
-
     def get_serializer_class(self):
         if self.action in ('retrieve', 'token_retrieve'):
             return InviteToCompanySerializer
         return None
 
+    def get_object_by_token(self, token):
+        invite = get_object_or_404(self.get_queryset(), token=token)
+        self.check_object_permissions(self.request, invite)
+        return invite
+
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         self.check_object_permissions(request, instance)
@@ -36,16 +39,38 @@ class InviteToCompanyViewSet(GarpixCompanyViewSetMixin, mixins.RetrieveModelMixi
     def accept(self, request, pk):
         invite = self.get_object()
         self.check_object_permissions(request, invite)
+        return self._accept(invite)
+
+    @action(methods=['post'], detail=True)
+    def decline(self, request, pk):
+        invite = self.get_object()
+        self.check_object_permissions(request, invite)
+        return self._decline(invite)
+
+    @action(methods=['get'], detail=False, url_path=r'token/(?P<token>[^/.]+)')
+    def token_retrieve(self, request, token):
+        invite = self.get_object_by_token(token)
+        serializer = self.get_serializer(invite)
+        return Response(serializer.data)
+
+    @action(methods=['post'], detail=False, url_path=r'token/(?P<token>[^/.]+)/accept')
+    def token_accept(self, request, token):
+        invite = self.get_object_by_token(token)
+        return self._accept(invite)
+
+    @action(methods=['post'], detail=False, url_path=r'token/(?P<token>[^/.]+)/decline')
+    def token_decline(self, request, token):
+        invite = self.get_object_by_token(token)
+        return self._decline(invite)
+
+    def _accept(self, invite):
         result, message = invite.accept()
         if result:
             serializer = InviteToCompanySerializer(invite)
             return Response(serializer.data)
         return Response({'non_field_error': [message]}, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(methods=['post'], detail=True)
-    def decline(self, request, pk):
-        invite = self.get_object()
-        self.check_object_permissions(request, invite)
+    def _decline(self, invite):
         invite.decline()
         serializer = InviteToCompanySerializer(invite)
         return Response(serializer.data)
@@ -1,18 +1,32 @@
+from django.conf import settings
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils.module_loading import import_string
 from rest_framework.generics import get_object_or_404
-from rest_framework import status, mixins, filters
+from rest_framework import status, mixins
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from garpix_company.filters import MemberOrderingFilter
 from garpix_company.mixins.views import GarpixCompanyViewSetMixin
 from garpix_company.models import get_company_model
 from garpix_company.models.user_company import get_user_company_model
 from garpix_company.permissions import CompanyAdminOnly, CompanyOwnerOnly
-from garpix_company.serializers.user_company import UserCompanySerializer, ChangeUserRoleSerializer
+from garpix_company.services.conditional_service import company_conditional_response
+from garpix_company.services.member_bulk_service import BulkMemberService
+from garpix_company.services.member_export_service import MemberExportService
+from garpix_company.serializers.user_company import UserCompanySerializer, ChangeUserRoleSerializer, \
+    BulkUserCompanySerializer, BulkChangeUserRoleSerializer
 from django.utils.translation import gettext_lazy as _
 
 
 UserCompany = get_user_company_model()
+MemberSearchBackend = import_string(getattr(settings, 'GARPIX_COMPANY_MEMBER_SEARCH_BACKEND',
+                                            'garpix_company.filters.MemberSearchFilter'))
+MembersPagination = import_string(getattr(settings, 'GARPIX_COMPANY_MEMBERS_PAGINATION_CLASS',
+                                          'garpix_company.pagination.MemberCursorPagination'))
 
 
 class UserCompanyViewSet(GarpixCompanyViewSetMixin,
@@ -23,22 +37,67 @@ class UserCompanyViewSet(GarpixCompanyViewSetMixin,
     permission_classes = [CompanyAdminOnly | CompanyOwnerOnly]
     queryset = UserCompany.objects.all()
     serializer_class = UserCompanySerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, MemberSearchBackend, MemberOrderingFilter]
     search_fields = ['user__email', 'user__first_name', 'user__last_name']
     filterset_fields = ['is_blocked', 'role']
+    ordering_fields = ['created_at', 'user_email', 'user_first_name', 'user_last_name']
+    ordering = ('-created_at', '-id')
+    pagination_class = MembersPagination
 
     def get_serializer_class(self):
         if self.action in ['list', 'retrieve']:
             return UserCompanySerializer
         if self.action == 'change_role':
             return ChangeUserRoleSerializer
+        if self.action in ['bulk_block', 'bulk_unblock', 'bulk_kick']:
+            return BulkUserCompanySerializer
+        if self.action == 'bulk_change_role':
+            return BulkChangeUserRoleSerializer
         return None
 
+    def get_company(self):
+        """
+        Компания из URL, загружается один раз за запрос
+        """
+        if not hasattr(self, '_company'):
+            Company = get_company_model()
+            self._company = get_object_or_404(Company.objects.all(), id=self.kwargs.get("company_pk"))
+        return self._company
+
     def get_queryset(self, *args, **kwargs):
-        Company = get_company_model()
-        company_pk = self.kwargs.get("company_pk")
-        company = get_object_or_404(Company.objects.all(), id=company_pk)
-        return self.queryset.filter(company=company)
+        queryset = self.queryset.filter(company=self.get_company())
+        if self.action in ['list', 'retrieve']:
+            queryset = queryset.select_related('user', 'role')
+        if self.action in ['list', 'export']:
+            queryset = queryset.annotate(user_email=F('user__email'), user_first_name=F('user__first_name'),
+                                         user_last_name=F('user__last_name'))
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        company = self.get_company()
+        self.check_object_permissions(request, company)
+        return company_conditional_response(request, company, lambda: super(UserCompanyViewSet, self).list(
+            request, *args, **kwargs), weak=True)
+
+    @extend_schema(parameters=[
+        OpenApiParameter(
+            name='export_format',
+            type=str,
+            enum=sorted(MemberExportService.FORMATS)
+        ),
+    ])
+    @action(methods=['GET'], detail=False)
+    def export(self, request, *args, **kwargs):
+        company = self.get_company()
+        self.check_object_permissions(request, company)
+        export_format = request.GET.get('export_format', MemberExportService.FORMAT_CSV)
+        if export_format not in MemberExportService.FORMATS:
+            return Response({'export_format': [_('Неизвестный формат выгрузки')]}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(MemberExportService(queryset).iter_export(export_format),
+                                         content_type=MemberExportService.FORMATS[export_format])
+        response['Content-Disposition'] = f'attachment; filename="company_{company.pk}_users.{export_format}"'
+        return response
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -76,3 +135,27 @@ class UserCompanyViewSet(GarpixCompanyViewSetMixin,
         if result:
             return Response({'status': _('success')}, status=status.HTTP_200_OK)
         return Response({'non_field_error': [message]}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(methods=['POST'], detail=False)
+    def bulk_block(self, request, *args, **kwargs):
+        return self._bulk(request, lambda service, data: service.block(data['ids']))
+
+    @action(methods=['POST'], detail=False)
+    def bulk_unblock(self, request, *args, **kwargs):
+        return self._bulk(request, lambda service, data: service.unblock(data['ids']))
+
+    @action(methods=['POST'], detail=False)
+    def bulk_kick(self, request, *args, **kwargs):
+        return self._bulk(request, lambda service, data: service.kick(data['ids']))
+
+    @action(methods=['POST'], detail=False)
+    def bulk_change_role(self, request, *args, **kwargs):
+        return self._bulk(request, lambda service, data: service.change_role(data['ids'], data['role']))
+
+    def _bulk(self, request, operation):
+        company = self.get_company()
+        self.check_object_permissions(request, company)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = operation(BulkMemberService(company), serializer.validated_data)
+        return Response({'results': results}, status=status.HTTP_200_OK)